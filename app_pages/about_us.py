@@ -0,0 +1,34 @@
+from helper_functions.resources import get_static_page
+from helper_functions.utility import render_static_page
+
+# The page's content, merged once per process (see merge_blocks in helper_functions/static_assets.py)
+ABOUT_US = (
+    ("title", "About Us"),
+    ("markdown",
+        "## Project Scope\n"
+        "The **Retirement Advisor Chatbot** is an innovative web application designed to provide users with accurate and timely information regarding retirement planning, particularly focused on the Central Provident Fund (CPF) in Singapore. By leveraging government data sources, the chatbot aims to assist individuals in understanding their retirement options and obligations, thereby empowering them to make informed decisions.\n\n"
+        
+        "## Objectives\n"
+        "Our primary objectives are:\n"
+        "- **Information Dissemination**: To offer accessible and clear information about CPF-related matters, including contributions, withdrawals, and retirement planning.\n"
+        "- **User Engagement**: To create an interactive experience where users can ask questions and receive personalized responses, enhancing their understanding of retirement processes.\n"
+        "- **Data Integration**: To consolidate various government data sources into a single platform, streamlining the user experience when seeking information.\n\n"
+        
+        "## Data Sources\n"
+        "The chatbot utilizes a range of APIs from official government sources to ensure that the information provided is both reliable and up-to-date. Key data sources include:\n"
+        "- **Number of CPF Members & Net Balances**: Provides insights into CPF memberships categorized by age group and gender.\n"
+        "- **Retirement Withdrawals**: Offers annual statistics on retirement withdrawals to inform users about trends and averages.\n"
+        "- **Full Retirement Sum**: Details the full retirement sum that individuals should aim for as part of their CPF savings.\n"
+        "- **Monthly Payouts under Retirement Sum Scheme**: Displays information about the monthly payouts available to individuals under the retirement scheme.\n"
+        "- **Data reference is also date/time-stamped on the Chatbot page to alert users to recency of information.\n\n"
+        
+        "## Features\n"
+        "The Retirement Advisor Chatbot includes several key features to enhance user interaction:\n"
+        "- **Personalized Responses**: Utilizes OpenAI’s language model to generate answers tailored to user queries, taking into account individual circumstances like age and employment status.\n"
+        "- **User Feedback Mechanism**: Allows users to provide feedback or compliments, which helps in continuously improving the chatbot's performance and user experience.\n"
+    ),
+)
+
+# About Us page
+def about_us():
+    render_static_page(get_static_page("about_us", ABOUT_US))
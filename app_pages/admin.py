@@ -0,0 +1,93 @@
+import streamlit as st
+
+from helper_functions.resources import (
+    TELEMETRY_ENABLED,
+    get_admission_controller,
+    get_intent_router,
+    get_llm_client,
+    get_llm_single_flight,
+    get_response_cache,
+    get_session_store,
+    get_telemetry,
+)
+from helper_functions.utility import check_password
+
+# Admin page: where the time goes in a chat turn, and the app's counters
+def admin():
+    st.title("Admin")
+
+    #### Password protection: the Admin page has its own password, separate from the chat's
+    if not check_password("admin_password", label="Admin password"):
+        st.stop()  # Stop the app if the password is incorrect
+
+    telemetry = get_telemetry()
+    if not TELEMETRY_ENABLED:
+        st.info("Telemetry is disabled (TELEMETRY_ENABLED in the app secrets).")
+        return
+
+    import pandas as pd
+
+    # Span latencies, slowest p95 first
+    st.subheader("Latency by stage")
+    spans = telemetry.span_summary()
+    if spans:
+        frame = pd.DataFrame(spans).set_index("span")
+        timings = ["mean", "p50", "p95", "p99"]
+        frame[timings] = frame[timings] * 1000  # Seconds to milliseconds
+        st.dataframe(frame.rename(columns={column: f"{column} (ms)" for column in timings}).round(2),
+                     use_container_width=True)
+    else:
+        st.write("No spans recorded yet.")
+
+    st.subheader("Counters")
+    counters = telemetry.counters()
+    if counters:
+        st.dataframe(pd.DataFrame(counters), use_container_width=True, hide_index=True)
+    else:
+        st.write("No counters recorded yet.")
+
+    st.subheader("Caches and calls")
+    col1, col2, col3 = st.columns(3)
+    llm_summary = get_llm_client().summary()
+    col1.metric("LLM calls", llm_summary["calls"], f"{llm_summary['errors']} errors", delta_color="off")
+    cache_stats = get_response_cache().stats
+    col2.metric("Response cache hits", cache_stats["exact_hits"] + cache_stats["near_hits"],
+                f"{cache_stats['misses']} misses", delta_color="off")
+    col3.metric("Answered locally", f"{get_intent_router().summary()['hit_rate']:.0%}")
+
+    # OpenAI calls in flight and waiting, and the calls turned away (queue full, quota, timeout, 429s)
+    st.subheader("Admission control")
+    admission = get_admission_controller().summary()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("In flight", admission["active"], f"{admission['waiting']} waiting", delta_color="off")
+    average_wait = admission["average_wait"]
+    col2.metric("Average wait", f"{average_wait * 1000:.0f} ms" if average_wait is not None else "-",
+                f"{admission['queued']} queued", delta_color="off")
+    col3.metric("Rejected", sum(admission["rejected"].values()),
+                ", ".join(f"{count} {reason}" for reason, count in admission["rejected"].items()) or None,
+                delta_color="off")
+    col4.metric("OpenAI 429s", admission["rate_limited"],
+                f"paused {admission['paused_for']:.0f} s" if admission["paused_for"] else None, delta_color="off")
+
+    shared = get_llm_single_flight().summary()
+    st.caption(f"Identical questions asked at the same time: {shared['shared']} of {shared['calls']} "
+               f"OpenAI calls shared an in-flight call.")
+
+    # Chat sessions held on the server, and how many were evicted when idle
+    st.subheader("Sessions")
+    sessions = get_session_store().summary()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Sessions in memory", sessions["sessions"], f"{sessions['messages']} messages", delta_color="off")
+    col2.metric("Session state", f"{sessions['bytes'] / 1024:.0f} KiB",
+                f"largest {sessions['max_session_bytes'] / 1024:.1f} KiB", delta_color="off")
+    col3.metric("Evicted when idle", sessions["evicted"],
+                f"{sessions['spilled_sessions']} on disk" if sessions["spilled_sessions"] is not None else None,
+                delta_color="off")
+
+    with st.expander("Prometheus metrics"):
+        st.code(telemetry.prometheus_text(), language="text")
+
+    # Only reached with the admin password (see above)
+    if st.button("Reset metrics"):
+        telemetry.reset()
+        st.rerun()
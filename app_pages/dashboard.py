@@ -0,0 +1,55 @@
+import streamlit as st
+
+from helper_functions.resources import (
+    current_data_version,
+    get_dashboard_aggregates,
+    get_dataset_cache,
+    get_dataset_store,
+    get_intent_router,
+    get_llm_client,
+    sync_dataset_store,
+)
+
+# Data Dashboard page
+def data_dashboard():
+    st.title("Data Dashboard")
+    st.write("Trends and breakdowns from the CPF datasets published on data.gov.sg.")
+
+    dataset_cache = get_dataset_cache()
+    dataset_store = get_dataset_store()
+    sync_dataset_store(dataset_cache, dataset_store)
+
+    from helper_functions.dashboard import group_chart, trend_chart
+
+    # Charts are drawn from the memoized aggregates, never from the raw rows
+    aggregates = get_dashboard_aggregates(current_data_version(dataset_cache, dataset_store))
+    shown = False
+    for name, aggregate in aggregates.items():
+        if aggregate["trend"] is None and aggregate["by_group"] is None:
+            continue
+        shown = True
+        st.subheader(name)
+        if aggregate["trend"] is not None:
+            st.altair_chart(trend_chart(aggregate["trend"], "By year"), use_container_width=True)
+        if aggregate["by_group"] is not None:
+            measures = list(aggregate["by_group"]["measure"].unique())
+            measure = st.selectbox("Measure", measures, key=f"dashboard_measure_{name}")
+            st.altair_chart(group_chart(aggregate["by_group"], measure, "Latest year by age group and gender"),
+                            use_container_width=True)
+
+    if not shown:
+        st.info("The datasets are still being loaded from data.gov.sg. Please check back shortly.")
+
+    # How many chatbot questions were answered from the datasets without calling the LLM
+    with st.expander("Chatbot lookups answered locally"):
+        llm_summary = get_llm_client().summary()
+        tokens_per_call = llm_summary["total_tokens"] / llm_summary["calls"] if llm_summary["calls"] else None
+        routing = get_intent_router().summary(llm_summary["p50_latency"], tokens_per_call)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Questions", routing["questions"])
+        col2.metric("Answered locally", f"{routing['hit_rate']:.0%}")
+        if "estimated_seconds_saved" in routing:
+            col3.metric("LLM time saved", f"{routing['estimated_seconds_saved']:.1f} s")
+        if "estimated_tokens_saved" in routing:
+            st.caption(f"About {routing['estimated_tokens_saved']:,} tokens saved, "
+                       f"at the recent average of {tokens_per_call:.0f} tokens per LLM call.")
@@ -0,0 +1,55 @@
+import streamlit as st
+
+from helper_functions.resources import get_feedback_store, get_session_store
+from helper_functions.utility import current_session_id
+
+# Function to handle compliments, feedback, and complaints
+def handle_feedback():
+    st.title("Feedback")
+    feedback_type = st.radio("Select the type of feedback:", 
+                              ("Select", "Compliments", "Feedback", "Complaints"), 
+                              index=0)  # Default to the first option "Select"
+
+    feedback_message = st.text_area("Please enter your message:")
+    
+    # Add a slider for customer satisfaction rating (1 to 5 stars)
+    rating = st.slider("Please rate your experience:", 
+                       min_value=1, max_value=5, value=1, step=1)  # Default to 1 star
+    
+    # Display the selected stars
+    stars = "⭐" * rating  # Create a string of stars based on the rating
+    st.markdown(f"**Your Rating:** {stars}")
+
+    # Display interval labels
+    st.markdown(""" 
+        ⭐ - Very Dissatisfied, 
+        ⭐⭐ - Dissatisfied, 
+        ⭐⭐⭐ - Neutral, 
+        ⭐⭐⭐⭐ - Satisfied, 
+        ⭐⭐⭐⭐⭐ - Very Satisfied
+    """)
+
+    # Check if the feedback has been submitted
+    if st.button("Submit"):
+        # Only show success message if feedback_message is not empty
+        if feedback_message and feedback_type != "Select":
+            # Queue the feedback for storage; this returns immediately
+            get_feedback_store().submit(feedback_type, rating, feedback_message,
+                                      session_id=current_session_id())
+
+            if feedback_type == "Compliments":
+                st.success("Thank you for your feedback. We will be sure to pass your compliments to our colleague!")
+            elif feedback_type == "Feedback":
+                st.success("Thank you for your feedback. Please allow us to investigate and get back to you in 5 working days!")
+            elif feedback_type == "Complaints":
+                st.success("We apologise for the experience. Please allow us to investigate and get back to you in 5 working days!")
+        elif feedback_message:
+            st.warning("Please select the type of feedback before submitting.")
+        else:
+            st.warning("Please enter a message before submitting.")  # Alert user if message is empty
+
+    if st.button("Return"):
+        # Clear the session's chat state (kept server-side) to reset the session
+        get_session_store().reset(current_session_id())
+        st.session_state.page = "Chatbot"  # Set page to "Chatbot"
+        return  # Exit the function to redirect to the Chatbot page immediately
@@ -0,0 +1,74 @@
+from helper_functions.resources import get_static_page
+from helper_functions.utility import render_static_page
+
+# The page's content, merged once per process (see merge_blocks in helper_functions/static_assets.py)
+METHODOLOGY = (
+    ("title", "Methodology"),
+
+    # Page Introduction
+    ("markdown",
+        "The **Retirement Advisor Chatbot** is a multi-functional application designed to streamline user interactions with CPF-related information. "
+        "Through advanced AI processing, prompt engineering, and real-time data integration, this chatbot provides personalized responses, guided search, "
+        "and customer satisfaction feedback, all built on reliable government data sources."
+    ),
+    
+    ("markdown", "This **Methodology** section explains the chatbot’s data flows and implementation details for three main use cases:"),
+
+    # Use Case 1: General Information Checker
+    ("subheader", "1. General Information Checker"),
+    ("markdown",
+        "- **User Action**: User submits a factual question about CPF, e.g., 'What is the Full Retirement Sum?'\n"
+        "- **App Function**: Routes query to Information Chat pipeline.\n"
+        "- **Prompt Engineering**: Focused LLM response on CPF content.\n"
+        "- **Prompt Chaining**: Decomposes complex questions for clarity.\n"
+        "- **LLM Processing**: Generates answer based on CPF context.\n"
+        "- **Data Retrieval**: Supplementary data fetched from APIs (e.g., CPF Full Retirement Sum).\n"
+        "- **Output with Timestamp**: Adds timestamp and disclaimer.\n"
+        "- **User Action**: User views response.\n"
+    ),
+
+    
+    # Diagram (bundled locally, see helper_functions/static_assets.py)
+    ("image", "use_case_1.jpg", "Use Case 1"),
+    
+     
+    # Use Case 2: Personalized Adviser
+    ("subheader", "2. Personalized Adviser"),
+    ("markdown",
+        "- **User Action**: User provides personal details, such as gender, age, employment status, and topics of interest (e.g., 'What are my retirement options?').\n"
+        "- **App Function**: Performs Contextual Parsing to analyze the user's input along with the provided personal details.\n"
+        "- **Data Processing**: Retrieves relevant fields from stored government data or real-time API calls based on the user's profile and query.\n"
+        "- **LLM Summarization**: The LLM consolidates and summarizes the data, generating a personalized response tailored to the user's circumstances.\n"
+        "- **Prompt Injection Defense**: Applies techniques like XML-like tags, delimiters, and Sandwich Defense to safeguard against prompt injection.\n"
+        "- **Output**: Delivers the personalized response to the user, including a timestamp and disclaimer.\n"
+        "- **User Action**: User receives and reviews the tailored information, potentially asking follow-up questions.\n"
+    ),
+
+    # Diagram (bundled locally, see helper_functions/static_assets.py)
+    ("image", "use_case_2.jpg", "Use Case 2"),
+
+    # Use Case 3: Customer Satisfaction Evaluation
+    ("subheader", "3. Customer Satisfaction Evaluation"),
+    ("markdown",
+        "- **User Action**: User selects feedback options (compliment, complaint, or general feedback).\n"
+        "- **App Function**: Displays feedback form.\n"
+        "- **Data Categorization**: Categorizes feedback type, applies Sentiment Analysis where necessary.\n"
+        "- **Feedback Storage and Analysis**: Stores and analyzes feedback for improvements.\n"
+        "- **User Response**: Confirms receipt of feedback.\n"
+    ),
+
+    # Diagram (bundled locally, see helper_functions/static_assets.py)
+    ("image", "use_case_3.jpg", "Use Case 3"),
+
+ 
+    # Summary
+    ("markdown",
+        "Each use case contributes to the chatbot’s ongoing refinement, enhancing accuracy, security, and responsiveness. "
+        "By accurately responding to questions, navigating complex queries, and incorporating user feedback, the chatbot remains a reliable source of CPF information."
+    ),
+)
+
+# Methodology page
+
+def methodology():
+    render_static_page(get_static_page("methodology", METHODOLOGY))
@@ -0,0 +1,75 @@
+"""Times the Dashboard aggregates and chart rendering for large synthetic datasets.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_dashboard [row counts...]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from helper_functions.dashboard import compute_aggregates, group_chart, trend_chart
+
+AGE_GROUPS = ["Below 21", "21-24", "25-29", "30-34", "35-39", "40-44", "45-49",
+              "50-54", "55-59", "60-64", "65-69", "70 & Over"]
+
+
+# Function to build frames shaped like the CPF datasets, with `rows` rows each
+def synthetic_frames(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    years = rng.integers(1990, 2025, rows)
+    balances = pd.DataFrame({
+        "year": years,
+        "age_group": pd.Categorical(rng.choice(AGE_GROUPS, rows)),
+        "gender": pd.Categorical(rng.choice(["Male", "Female"], rows)),
+        "no_of_members": rng.integers(1, 5000, rows),
+        "net_balance": rng.random(rows) * 1e6,
+    })
+    withdrawals = pd.DataFrame({
+        "year": years,
+        "type_of_withdrawal": rng.choice(["Age 55", "Retirement Sum Scheme", "Others"], rows),
+        "amount_withdrawn": rng.random(rows) * 1e5,
+    })
+    payouts = pd.DataFrame({"year": years, "monthly_payout": rng.random(rows) * 2000})
+    return {
+        "Number of CPF Members & Net Balances by Age Group & Gender as at End of Year": balances,
+        "Retirement withdrawals, Annual": withdrawals,
+        "Yearly amount of monthly payout under Retirement Sum Scheme": payouts,
+    }
+
+
+def _best_of(repeats, func):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+# Function to render every dashboard chart to its Vega-Lite spec (what st.altair_chart sends)
+def render_charts(aggregates):
+    for name, aggregate in aggregates.items():
+        if aggregate["trend"] is not None:
+            trend_chart(aggregate["trend"], name).to_dict()
+        if aggregate["by_group"] is not None:
+            for measure in aggregate["by_group"]["measure"].unique():
+                group_chart(aggregate["by_group"], measure, name).to_dict()
+
+
+def main(row_counts):
+    print(f"{'rows':>10} {'aggregate ms':>14} {'render ms':>11} {'chart rows':>11}")
+    for rows in row_counts:
+        frames = synthetic_frames(rows)
+        aggregate_seconds = _best_of(3, lambda: compute_aggregates(frames))
+        aggregates = compute_aggregates(frames)
+        render_seconds = _best_of(3, lambda: render_charts(aggregates))
+        chart_rows = sum(len(frame) for aggregate in aggregates.values()
+                         for frame in aggregate.values() if frame is not None)
+        print(f"{rows:>10,} {aggregate_seconds * 1000:>14.1f} {render_seconds * 1000:>11.1f} {chart_rows:>11,}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,112 @@
+"""Checks the dataset fetch layer (helper_functions/http_fetch.py) against the data.gov.sg stub.
+
+* retries: a 503 or 429 followed by a success is retried and returns the
+  data; a persistent 503 gives up after MAX_ATTEMPTS with an error result;
+  a 404 is not retried;
+* pooling: sequential fetches reuse one kept-alive connection, and many
+  concurrent fetches (fetch_all) open at most POOL_SIZE connections;
+* revalidation: a fetch with the ETag of the previous response gets a 304
+  (no body), and one with a stale ETag gets the data again.
+
+Each check prints its outcome; the script exits non-zero if any fails.
+Nothing leaves the machine. Run from the repository root:
+
+    python -m benchmarks.bench_http_fetch
+"""
+import sys
+
+from benchmarks.mock_datagov import MockDataGovServer
+from helper_functions.http_fetch import MAX_ATTEMPTS, POOL_SIZE, fetch_all, fetch_url
+
+
+class CountingDataGovServer(MockDataGovServer):
+    """The data.gov.sg stub, failing the next `fail_next` requests and counting client connections."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_next = 0
+        self._connections = set()
+        counting = self
+        base = self.handler_class
+
+        class Handler(base):
+            def setup(self):
+                super().setup()
+                with counting._lock:
+                    counting._connections.add(self.client_address)
+
+        self._server.RequestHandlerClass = Handler
+
+    @property
+    def connections(self):
+        with self._lock:
+            return len(self._connections)
+
+    def _should_fail(self):
+        with self._lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return True
+        return super()._should_fail()
+
+
+def _check(label, passed, detail):
+    print(f"{label:<34} {'ok' if passed else 'FAILED':<7} {detail}")
+    return passed
+
+
+def _url(server, resource_id):
+    return f"{server.base_url}/api/action/datastore_search?resource_id={resource_id}&limit=10"
+
+
+def main():
+    ok = True
+    with CountingDataGovServer() as server:
+        for status in (503, 429):
+            server.failure_status = status
+            server.fail_next = MAX_ATTEMPTS - 1
+            result = fetch_url(_url(server, f"d_retry_{status}"))
+            ok &= _check(f"{status} then success", result.ok and result.attempts == MAX_ATTEMPTS,
+                         f"attempts={result.attempts}, {result.elapsed * 1000:.0f} ms")
+
+        server.failure_status = 503
+        server.fail_next = MAX_ATTEMPTS + 1
+        before = len(server.requests)
+        result = fetch_url(_url(server, "d_down"))
+        ok &= _check("persistent 503", not result.ok and len(server.requests) - before == MAX_ATTEMPTS,
+                     f"attempts={result.attempts}, status={result.status}, error={result.error!r}")
+        server.fail_next = 0
+
+        before = len(server.requests)
+        result = fetch_url(f"{server.base_url}/api/action/unknown")
+        ok &= _check("404 is not retried", not result.ok and len(server.requests) - before == 1,
+                     f"status={result.status}")
+
+    with CountingDataGovServer() as server:
+        results = [fetch_url(_url(server, f"d_sequential_{index}")) for index in range(20)]
+        ok &= _check("20 sequential fetches", all(r.ok for r in results) and server.connections == 1,
+                     f"{server.connections} connection(s)")
+
+    with CountingDataGovServer(latency=0.05) as server:
+        urls = [_url(server, f"d_concurrent_{index}") for index in range(4 * POOL_SIZE)]
+        results = fetch_all(urls)
+        ok &= _check(f"{len(urls)} concurrent fetches",
+                     all(r.ok for r in results.values()) and server.connections <= POOL_SIZE,
+                     f"{server.connections} connection(s), pool size {POOL_SIZE}")
+
+    with CountingDataGovServer() as server:
+        url = _url(server, "d_frs")
+        first = fetch_url(url)
+        again = fetch_url(url, etag=first.etag)
+        ok &= _check("same ETag -> 304", first.ok and bool(first.etag) and again.not_modified and again.data is None,
+                     f"etag={first.etag}, status={again.status}")
+        stale = fetch_url(url, etag='"stale"')
+        ok &= _check("stale ETag -> 200", stale.status == 200 and stale.data == first.data,
+                     f"status={stale.status}")
+
+    print("ok" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
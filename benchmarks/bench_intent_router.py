@@ -0,0 +1,83 @@
+"""Checks and times the local intent router (helper_functions/intent_router.py).
+
+Runs fixed phrasings through IntentRouter.answer over the synthetic
+data.gov.sg datasets (benchmarks/mock_datagov.py):
+
+* questions the datasets cannot answer (other retirement sums, the
+  retirement age, history, method and comparison questions, values that are
+  not in the data) must go to the LLM, never to a templated answer;
+* plain lookups must still be answered locally, from the right dataset.
+
+Then it times routing. The script exits non-zero if any check fails.
+
+    python -m benchmarks.bench_intent_router [iterations]
+"""
+import sys
+import time
+
+from benchmarks.mock_datagov import synthetic_resource
+from helper_functions.intent_router import IntentRouter
+from helper_functions.retrieval import RetrievalIndex
+
+# Asked about something the datasets do not hold, or not a plain lookup: the LLM answers
+TO_LLM = [
+    "what is the retirement age",
+    "what is the basic retirement sum",
+    "what is the enhanced retirement sum in 2023",
+    "what is the minimum sum",
+    "When did the FRS start?",
+    "how is the frs computed",
+    "Is the basic retirement sum lower than the full retirement sum?",
+    "full retirement sum for 1990",
+    "number of members aged 150",
+    "What is the FRS and how much can I withdraw at 55?",
+]
+
+# (question, intent) answered from the local datasets
+LOCAL = [
+    ("full retirement sum for 2020", "full_retirement_sum"),
+    ("What is the FRS?", "full_retirement_sum"),
+    ("what was the frs in 2020", "full_retirement_sum"),
+    ("monthly payout under RSS", "rss_payout"),
+    ("rss payouts in 2022", "rss_payout"),
+    ("number of female members aged 55", "member_balances"),
+    ("how many cpf members are there", "member_balances"),
+    ("net balances by age group", "member_balances"),
+    ("retirement withdrawals in 2023", "withdrawals"),
+]
+
+
+def _retrieval_index(router):
+    datasets = {intent.dataset: synthetic_resource(resource)[1]
+                for intent, resource in zip(router.intents.values(), ("frs", "rss", "members", "withdrawals"))}
+    return RetrievalIndex(datasets)
+
+
+def main(iterations):
+    router = IntentRouter()
+    index = _retrieval_index(router)
+    ok = True
+    for question in TO_LLM:
+        decision, answer = router.answer(question, index)
+        passed = answer is None
+        ok &= passed
+        print(f"{'ok' if passed else 'FAILED':<7} LLM    {question!r} -> {decision.intent} ({decision.source})")
+    for question, intent in LOCAL:
+        decision, answer = router.answer(question, index)
+        passed = answer is not None and decision.intent == intent
+        ok &= passed
+        print(f"{'ok' if passed else 'FAILED':<7} local  {question!r} -> {decision.intent}")
+
+    questions = TO_LLM + [question for question, _intent in LOCAL]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for question in questions:
+            router.route(question)
+    per_call = (time.perf_counter() - start) / (iterations * len(questions))
+    print(f"route(): {per_call * 1e6:.0f} us per question")
+    print("ok" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
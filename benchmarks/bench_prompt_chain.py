@@ -0,0 +1,85 @@
+"""Times the prompt chain on multi-part questions against the local mock LLM.
+
+Each question is answered twice: with the sub-questions run one at a time
+(max_concurrency=1) and concurrently. With a fixed per-call latency, the
+concurrent chain should take about two calls (slowest sub-call plus the
+synthesis) however many parts the question has.
+
+It also checks that a part referring back to an earlier one is never split
+off ("What is the FRS and is it higher than in 2023?" is one step), and that
+every call of a chain is sent the conversation so far. The script exits
+non-zero if a check fails.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_prompt_chain [latency seconds]
+"""
+import sys
+
+from benchmarks.mock_llm import MockLLMServer
+from helper_functions.llm_client import build_async_openai_client
+from helper_functions.prompt_chain import PromptChain, decompose
+
+SYSTEM_PROMPT = "You are a CPF retirement advisor."
+QUESTIONS = [
+    "What is the Full Retirement Sum?",
+    "What is the FRS and how much can I withdraw at 55?",
+    "What is the BRS? How do monthly payouts work? Can I top up my RA?",
+    "What is the BRS? What is the ERS? How do monthly payouts work? When do payouts start?",
+]
+
+# (question, number of steps): parts that refer back to an earlier one stay with it
+DECOMPOSITIONS = [
+    ("What is the FRS and how much can I withdraw at 55?", 2),
+    ("What is the FRS for 2024 and is it higher than 2023?", 1),
+    ("What is the FRS? Is it higher than in 2023?", 1),
+    ("What is the FRS and how does that compare with the BRS? Can I top up my RA?", 2),
+]
+HISTORY = [{"role": "user", "content": "I am 54 and self-employed."},
+           {"role": "assistant", "content": "Noted: 54, self-employed."}]
+
+
+def _chain(server, max_concurrency):
+    return PromptChain(lambda: build_async_openai_client("not-used", base_url=server.base_url),
+                       max_concurrency=max_concurrency)
+
+
+def _check(label, passed, detail):
+    print(f"{'ok' if passed else 'FAILED':<7} {label}: {detail}")
+    return passed
+
+
+def main(latency):
+    ok = True
+    for question, expected in DECOMPOSITIONS:
+        steps = decompose(question)
+        ok &= _check(f"{expected} step(s)", len(steps) == expected, f"{question!r} -> {steps}")
+
+    print(f"mock LLM latency: {latency * 1000:.0f} ms per call")
+    print(f"{'parts':>5} {'calls':>5} {'one at a time ms':>17} {'concurrent ms':>14}")
+    with MockLLMServer(latency=latency) as server:
+        sequential, concurrent = _chain(server, 1), _chain(server, 4)
+        try:
+            for question in QUESTIONS:
+                before = len(server.requests)
+                slow = sequential.run(sequential.answer(question, SYSTEM_PROMPT))
+                calls = len(server.requests) - before
+                fast = concurrent.run(concurrent.answer(question, SYSTEM_PROMPT))
+                parts = max(len(fast.steps), 1)
+                print(f"{parts:>5} {calls:>5} {slow.latency * 1000:>17.0f} {fast.latency * 1000:>14.0f}")
+
+            before = len(server.requests)
+            concurrent.run(concurrent.answer(QUESTIONS[1], SYSTEM_PROMPT, history=HISTORY))
+            sent = server.requests[before:]
+            with_history = sum(1 for body in sent if body["messages"][1:3] == HISTORY)
+            ok &= _check("conversation sent with every call", sent and with_history == len(sent),
+                         f"{with_history} of {len(sent)} calls")
+        finally:
+            sequential.close()
+            concurrent.close()
+    print("ok" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.5))
@@ -0,0 +1,74 @@
+"""Checks and times the response cache's near-duplicate tier (helper_functions/response_cache.py).
+
+Caches an answer for one phrasing and asks again with another:
+
+* rephrasings that differ only in case, punctuation, stop-words or plurals
+  must be served the cached answer;
+* questions that ask something else must miss, even when they are spelled
+  almost the same: a negation ("can I not withdraw"), an extra or missing
+  content word ("... scheme payout"), another year, age or gender.
+
+Then it times get() for a near hit and a miss against a full cache. The
+script exits non-zero if any check fails.
+
+    python -m benchmarks.bench_response_cache [iterations]
+"""
+import sys
+import time
+
+from helper_functions.response_cache import ResponseCache
+
+CONTEXT = "<User Details>\nAge: 55\nGender: Female\n<End of User Details>\n"
+
+# (cached question, asked question) that must be served the cached answer
+HITS = [
+    ("How much can I withdraw at 55?", "how much can i withdraw at 55"),
+    ("What is the full retirement sum in 2024?", "What's the full retirement sum in 2024"),
+    ("What is the retirement sum scheme?", "what is the Retirement Sum Schemes"),
+    ("Tell me the monthly payout under RSS", "tell me the monthly payouts under RSS"),
+]
+
+# (cached question, asked question) that must miss
+MISSES = [
+    ("How much can I withdraw", "How much can I not withdraw"),
+    ("How much can I withdraw", "How much can't I withdraw"),
+    ("Can I withdraw my CPF savings?", "Can I never withdraw my CPF savings?"),
+    ("What is the retirement sum scheme?", "What is the retirement sum scheme payout?"),
+    ("What is the retirement sum scheme payout?", "What is the retirement sum scheme?"),
+    ("What is the full retirement sum in 2024?", "What is the full retirement sum in 2025?"),
+    ("number of female members aged 55", "number of male members aged 55"),
+]
+
+
+def _prompt(question):
+    return f"{CONTEXT}<User Query>\n{question}\n<End of User Input>"
+
+
+def main(iterations):
+    ok = True
+    for cached, asked, expected in [(c, a, "hit") for c, a in HITS] + [(c, a, "miss") for c, a in MISSES]:
+        cache = ResponseCache()
+        cache.put(_prompt(cached), "cached answer")
+        hit = cache.get(_prompt(asked))
+        passed = (hit is not None) == (expected == "hit")
+        ok &= passed
+        print(f"{'ok' if passed else 'FAILED':<7} {expected:<5} {cached!r} -> {asked!r}: {hit[1] if hit else 'miss'}")
+
+    cache = ResponseCache()
+    for index in range(200):
+        cache.put(_prompt(f"What is the full retirement sum in {1900 + index}?"), "cached answer")
+        cache.put(_prompt(f"How much can I withdraw at {index}?"), "cached answer")
+    cache.put(_prompt("What is the retirement sum scheme?"), "cached answer")
+    for label, question in (("near hit", "what is the Retirement Sum Schemes"),
+                            ("miss", "What is the retirement sum scheme payout?")):
+        prompt = _prompt(question)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            cache.get(prompt)
+        print(f"get() {label}: {(time.perf_counter() - start) / iterations * 1e6:.0f} us")
+    print("ok" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,47 @@
+"""Measures feedback sentiment/topic scoring throughput (messages per second).
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sentiment [batch sizes...]
+"""
+import sys
+import time
+
+import numpy as np
+
+from helper_functions.sentiment import score_arrays
+
+TEMPLATES = [
+    "The chatbot was very helpful and the answer about my {topic} was clear, thanks!",
+    "Not helpful at all, the {topic} information was wrong and the page was slow",
+    "How do I check my {topic}? The website is confusing",
+    "Staff at the service centre were friendly and patient when I asked about {topic}",
+    "I am disappointed, my {topic} appeal has been delayed for weeks",
+    "Good app but I could not find the {topic} details I wanted",
+]
+TOPICS = ["monthly payout", "full retirement sum", "withdrawal", "medisave", "hdb loan", "contribution rates"]
+
+
+# Function to build `count` feedback messages of realistic length
+def synthetic_messages(count, seed=0):
+    rng = np.random.default_rng(seed)
+    templates = rng.integers(0, len(TEMPLATES), count)
+    topics = rng.integers(0, len(TOPICS), count)
+    return [TEMPLATES[t].format(topic=TOPICS[k]) for t, k in zip(templates, topics)]
+
+
+def main(batch_sizes):
+    print(f"{'batch':>10} {'seconds':>9} {'messages/s':>12}")
+    for size in batch_sizes:
+        messages = synthetic_messages(size)
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            score_arrays(messages)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"{size:>10,} {best:>9.4f} {size / best:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [200, 5_000, 100_000])
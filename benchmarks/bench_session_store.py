@@ -0,0 +1,121 @@
+"""Measures chat session state in memory: plain dicts versus the session store.
+
+Builds the same conversations (common questions, short answers, form
+values) for many sessions, once as st.session_state used to hold them
+(a list of {"role", "content"} dicts and a user_info dict per session) and
+once in the SessionStore (__slots__ records, interned strings), and reports
+the traced allocations per session. Then it lets the sessions go idle and
+shows that eviction (optionally spilling to SQLite) frees them, how long
+a request for an active session waits while the sweep writes them out, and
+that spilled sessions are purged once past their TTL.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_session_store [sessions] [turns]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from helper_functions.session_store import ASSISTANT, USER, SessionStore
+
+QUESTIONS = ["What is the Full Retirement Sum?", "How do I plan for retirement?",
+             "monthly payout under RSS", "Can I top up my retirement account?"]
+USER_INFO = {"gender": "Female", "age_group": "56", "employment_status": "Employed", "topic": "Enquiry"}
+
+
+def _conversation(session, turns):
+    for turn in range(turns):
+        question = QUESTIONS[(session + turn) % len(QUESTIONS)]
+        # Build the strings at run time, as Streamlit does for each request (not shared constants)
+        yield "".join(question), f"Answer {session}-{turn}: " + "Your CPF savings. " * 8
+
+
+def _traced(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return kept, size
+
+
+def _as_dicts(sessions, turns):
+    state = {}
+    for session in range(sessions):
+        messages = []
+        for question, answer in _conversation(session, turns):
+            messages.append({"role": "".join("user"), "content": question})
+            messages.append({"role": "".join("assistant"), "content": answer})
+        state[session] = {"messages": messages, "user_info": {k: "".join(v) for k, v in USER_INFO.items()}}
+    return state
+
+
+def _in_store(store, sessions, turns):
+    for session in range(sessions):
+        state = store.get(f"session-{session}")
+        state.set_user_info({k: "".join(v) for k, v in USER_INFO.items()})
+        for question, answer in _conversation(session, turns):
+            store.add_message(state, USER, question)
+            store.add_message(state, ASSISTANT, answer)
+    return store
+
+
+def main(sessions, turns):
+    print(f"{sessions} sessions x {turns} turns")
+    _kept, dict_bytes = _traced(lambda: _as_dicts(sessions, turns))
+    print(f"{'plain dicts':<28} {dict_bytes / sessions:>8.0f} bytes per session")
+
+    store, store_bytes = _traced(lambda: _in_store(SessionStore(conversation_factory=lambda: None, sweep_seconds=0), sessions, turns))
+    print(f"{'session store':<28} {store_bytes / sessions:>8.0f} bytes per session "
+          f"(store's own estimate: {store.summary()['bytes'] / sessions:.0f})")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        spilling = SessionStore(idle_seconds=0.05, conversation_factory=lambda: None, sweep_seconds=0,
+                                spill_path=os.path.join(data_dir, "sessions.sqlite3"))
+        _in_store(spilling, sessions, turns)
+        time.sleep(0.1)
+        start = time.perf_counter()
+        evicted = spilling.sweep()
+        sweep_ms = (time.perf_counter() - start) * 1000
+        summary = spilling.summary()
+        print(f"{'after idle eviction':<28} {summary['sessions']} sessions in memory, {evicted} spilled "
+              f"to SQLite in {sweep_ms:.0f} ms")
+        start = time.perf_counter()
+        state = spilling.get("session-0")
+        recent = spilling.history(state)[-2:]
+        print(f"{'restore one session':<28} {(time.perf_counter() - start) * 1000:.1f} ms, "
+              f"{len(spilling.history(state))} messages, last: {recent[-1].content[:24]!r}")
+
+        # Requests for an active session while the sweeper writes the idle ones out
+        _in_store(spilling, sessions, turns)
+        time.sleep(0.1)
+        sweeper = threading.Thread(target=spilling.sweep)
+        waits = []
+        sweeper.start()
+        while sweeper.is_alive():
+            start = time.perf_counter()
+            spilling.get("active")
+            waits.append(time.perf_counter() - start)
+            time.sleep(0.001)
+        sweeper.join()
+        print(f"{'request during the sweep':<28} {len(waits)} requests, slowest {max(waits) * 1000:.1f} ms")
+
+        # Spilled sessions nobody asks for again are purged once they are older than spill_ttl_seconds
+        start = time.perf_counter()
+        purged = spilling.purge(now=time.time() + spilling.spill_ttl_seconds + 1)
+        purge_ms = (time.perf_counter() - start) * 1000
+        with spilling._db_lock:
+            left = spilling._connection.execute(
+                "SELECT (SELECT COUNT(*) FROM sessions), (SELECT COUNT(*) FROM messages "
+                "WHERE session_id NOT IN ('active', 'session-0'))").fetchone()
+        print(f"{'purge after the TTL':<28} {purged} sessions deleted in {purge_ms:.0f} ms, "
+              f"{left[0]} sessions and {left[1]} of their messages left")
+        spilling.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000, int(sys.argv[2]) if len(sys.argv) > 2 else 10)
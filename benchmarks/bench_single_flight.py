@@ -0,0 +1,136 @@
+"""Checks that concurrent identical requests share one upstream call.
+
+N threads ask the same thing at the same moment, against the local stubs:
+
+* the same dataset URL through fetch_url (query parameters in any order);
+* the same question as a blocking completion (LLMClient.chat);
+* the same question as a streamed completion (LLMClient.chat_stream),
+  where every reader must receive the full answer.
+
+Each case must reach its stub exactly once and give every caller the same
+result; the script exits non-zero otherwise. Then a distinct question per
+thread is timed for comparison. Finally, a leader that is over its own
+session quota, or stopped by a rerun, must not pass that on: a follower
+takes over the call and everyone else still gets the answer.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_single_flight [concurrent callers]
+"""
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mock_datagov import MockDataGovServer
+from benchmarks.mock_llm import MockLLMServer
+from helper_functions.admission import AdmissionRejected, is_session_rejection
+from helper_functions.http_fetch import fetch_url
+from helper_functions.llm_client import LLMClient, build_openai_client
+from helper_functions.single_flight import SingleFlight, request_key
+
+MODEL = "gpt-3.5-turbo"
+
+
+# Function to call func(index) from n threads released together; returns (results, seconds)
+def _together(n, func):
+    barrier = threading.Barrier(n)
+
+    def call(index):
+        barrier.wait()
+        return func(index)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        results = list(pool.map(call, range(n)))
+    return results, time.perf_counter() - start
+
+
+def _check(label, n, upstream_calls, results, seconds):
+    same = all(result == results[0] for result in results)
+    print(f"{label:<30} {n:>4} concurrent -> {upstream_calls} upstream call(s), "
+          f"{'identical' if same else 'DIFFERENT'} results, {seconds * 1000:.0f} ms")
+    return upstream_calls == 1 and same
+
+
+def _messages(question):
+    return [{"role": "system", "content": "You are a CPF retirement advisor."},
+            {"role": "user", "content": question}]
+
+
+def main(n):
+    ok = True
+    with MockDataGovServer(latency=0.3) as datagov:
+        urls = [f"{datagov.base_url}/api/action/datastore_search?resource_id=d_frs&limit=100",
+                f"{datagov.base_url}/api/action/datastore_search?limit=100&resource_id=d_frs"]
+        results, seconds = _together(n, lambda i: fetch_url(urls[i % 2]).data)
+        ok &= _check("fetch_url", n, len(datagov.requests), results, seconds)
+
+    with MockLLMServer(latency=0.3, token_interval=0.01) as server:
+        client = LLMClient(build_openai_client("not-used", base_url=server.base_url))
+        flights = SingleFlight("llm")
+
+        # Case and spacing differences are normalised away, as in the response cache
+        questions = ["What is the Full Retirement Sum?", "what is the full  retirement sum"]
+
+        def ask(i):
+            messages = _messages(questions[i % 2])
+            response = flights.do(request_key(MODEL, messages), lambda: client.chat(messages, model=MODEL))
+            return response.choices[0].message.content
+
+        before = len(server.requests)
+        results, seconds = _together(n, ask)
+        ok &= _check("LLM completion", n, len(server.requests) - before, results, seconds)
+
+        def ask_streamed(i):
+            messages = _messages(questions[i % 2])
+            stream = flights.stream(request_key(MODEL, messages), lambda: client.chat_stream(messages, model=MODEL))
+            return "".join(stream)
+
+        before = len(server.requests)
+        results, seconds = _together(n, ask_streamed)
+        ok &= _check("LLM stream", n, len(server.requests) - before, results, seconds)
+
+        before = len(server.requests)
+        _results, seconds = _together(n, lambda i: client.chat(_messages(f"Question {i}"), model=MODEL))
+        print(f"{'distinct questions':<30} {n:>4} concurrent -> {len(server.requests) - before} upstream calls, "
+              f"{seconds * 1000:.0f} ms")
+        print(f"LLM single-flight: {flights.summary()}")
+
+        # Caller 0 leads, then gives up: over its quota (an Exception) or stopped (a BaseException, as
+        # Streamlit's rerun is). Everyone else must still get the answer, from one more upstream call.
+        class Stopped(BaseException):
+            pass
+
+        for label, failure in (("leader over its quota", AdmissionRejected("session_quota")),
+                               ("leader stopped", Stopped())):
+            flights = SingleFlight("llm", private_error=is_session_rejection)
+            messages = _messages(f"What is the FRS? ({label})")
+            lead_started = threading.Event()
+
+            def leader_call():
+                lead_started.set()
+                time.sleep(0.2)  # Let the followers join
+                raise failure
+
+            def take_part(i):
+                if i == 0:
+                    try:
+                        flights.do(request_key(MODEL, messages), leader_call)
+                    except BaseException as e:
+                        return type(e).__name__
+                lead_started.wait()
+                return flights.do(request_key(MODEL, messages),
+                                  lambda: client.chat(messages, model=MODEL)).choices[0].message.content
+
+            before = len(server.requests)
+            results, seconds = _together(n, take_part)
+            ok &= _check(label, n - 1, len(server.requests) - before, results[1:], seconds)
+            ok &= results[0] == type(failure).__name__
+
+    print("ok" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 16))
@@ -0,0 +1,65 @@
+"""Measures the per-call overhead of telemetry spans and counters.
+
+Compares an empty loop body with a span and a counter increment, with
+telemetry disabled (the shared no-op span) and enabled (in memory, and with
+the JSONL export to a temporary file).
+
+Run from the repository root:
+
+    python -m benchmarks.bench_telemetry [iterations]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from helper_functions.telemetry import Telemetry
+
+
+def _per_call_ns(func, iterations):
+    start = time.perf_counter()
+    func(iterations)
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def _baseline(iterations):
+    for _ in range(iterations):
+        pass
+
+
+def _spans(telemetry):
+    def run(iterations):
+        span = telemetry.span
+        for _ in range(iterations):
+            with span("bench.stage"):
+                pass
+    return run
+
+
+def _counters(telemetry):
+    def run(iterations):
+        increment = telemetry.increment
+        for _ in range(iterations):
+            increment("bench_bytes", 128, kind="answer")
+    return run
+
+
+def main(iterations):
+    baseline = _per_call_ns(_baseline, iterations)
+    with tempfile.TemporaryDirectory() as directory:
+        configurations = [
+            ("disabled", Telemetry(enabled=False)),
+            ("in memory", Telemetry(enabled=True)),
+            ("with JSONL", Telemetry(enabled=True, jsonl_path=os.path.join(directory, "spans.jsonl"))),
+        ]
+        print(f"empty loop: {baseline:.0f} ns per iteration; overhead per call below")
+        print(f"{'telemetry':<12} {'span ns':>9} {'counter ns':>11}")
+        for label, telemetry in configurations:
+            span_ns = _per_call_ns(_spans(telemetry), iterations) - baseline
+            counter_ns = _per_call_ns(_counters(telemetry), iterations) - baseline
+            print(f"{label:<12} {span_ns:>9.0f} {counter_ns:>11.0f}")
+            telemetry.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
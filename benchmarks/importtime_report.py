@@ -0,0 +1,120 @@
+"""Import-time and first-paint report for each page of the app.
+
+Every measurement runs in a fresh interpreter, so it reflects a cold start.
+The page is rendered headless with Streamlit's AppTest under
+`python -X importtime`, and only the imports made while it renders are
+counted (`import streamlit` and AppTest are loaded beforehand). That
+includes the imports deferred into the page's functions and the cached
+resource getters:
+
+* imports: total import time of the render, and the heaviest packages
+  (pandas, openai, numpy, ...) by their own import time, nested imports
+  included;
+* first paint: wall time of the first run of the page, imports included;
+* rerun: wall time of a second run, i.e. the render once everything is loaded.
+
+Run from the repository root:
+
+    python -m benchmarks.importtime_report [--top N]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit_app import PAGES  # noqa: E402  (only imports streamlit)
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+RENDER_MARKER = "--- render ---"
+
+FIRST_PAINT_SCRIPT = """
+import json, sys, time
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+script = '''
+import streamlit as st
+import streamlit_app
+streamlit_app.render_page({page!r})
+'''
+at = AppTest.from_string(script, default_timeout=60)
+at.secrets["OPENAI_API_KEY"] = "not-used"
+at.secrets["password"] = "not-used"
+at.session_state["password_correct"] = True
+print({marker!r}, file=sys.stderr, flush=True)
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+start = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "rerun": rerun, "errors": [e.message for e in at.exception]}}))
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    return env
+
+
+# Function to add up the imports made after the marker: the total, and each top-level package's own time
+def parse_imports(stderr):
+    rendering = False
+    total = 0
+    packages = {}
+    for line in stderr.splitlines():
+        if line.strip() == RENDER_MARKER:
+            rendering = True
+            continue
+        match = IMPORTTIME_LINE.match(line) if rendering else None
+        if not match:
+            continue
+        self_us, cumulative, depth, name = (int(match.group(1)), int(match.group(2)),
+                                            len(match.group(3)) // 2, match.group(4))
+        if depth == 0:
+            total += cumulative  # An outermost import includes everything it pulled in
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us  # Own time, so nested imports are not counted twice
+    return total, packages
+
+
+# Function to render a page headless in a fresh interpreter: (imports, packages, first paint, rerun, errors)
+def profile_page(page):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", FIRST_PAINT_SCRIPT.format(page=page, marker=RENDER_MARKER)],
+        cwd=ROOT, env=_env(), capture_output=True, text=True,
+    )
+    total_us, packages = parse_imports(result.stderr)
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if result.returncode != 0 or not lines:
+        errors = [line for line in result.stderr.strip().splitlines() if not IMPORTTIME_LINE.match(line)]
+        return total_us, packages, None, None, [errors[-1] if errors else "failed"]
+    data = json.loads(lines[-1])
+    return total_us, packages, data["seconds"], data["rerun"], data["errors"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=6, help="heaviest packages to list per page")
+    args = parser.parse_args()
+
+    print(f"{'page':<12} {'imports ms':>11} {'first paint ms':>15} {'rerun ms':>9}  heaviest packages (ms)")
+    for page in PAGES:
+        total_us, packages, seconds, rerun, errors = profile_page(page)
+        heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        heaviest_text = ", ".join(f"{name} {us / 1000:.0f}" for name, us in heaviest if us >= 1000)
+        paint_text = f"{seconds * 1000:.0f}" if seconds is not None else "error"
+        rerun_text = f"{rerun * 1000:.0f}" if rerun is not None else "error"
+        print(f"{page:<12} {total_us / 1000:>11.1f} {paint_text:>15} {rerun_text:>9}  {heaviest_text}")
+        for error in errors:
+            print(f"{'':<12} ! {error}")
+
+
+if __name__ == "__main__":
+    main()
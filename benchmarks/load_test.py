@@ -0,0 +1,249 @@
+"""Offline load test of the chatbot pipeline against local stub servers.
+
+Starts the mock LLM (benchmarks/mock_llm.py) and the data.gov.sg stub
+(benchmarks/mock_datagov.py) with the given latency and injected failures,
+points the app at them, and measures:
+
+* fetch_api_data: concurrent dataset fetches;
+* get_chatbot_response: concurrent blocking LLM answers;
+* chat turns: N concurrent headless sessions (Streamlit's AppTest) each
+  sending a series of questions through the Chatbot page;
+* memory: traced allocations, and the session store's size, per session.
+
+AppTest runs are not thread-safe within one process, so each session runs
+in its own worker process; the workers warm up first and then start their
+turns together, so they load the stubs concurrently.
+
+Nothing leaves the machine, so a regression shows up here without network
+access. Run from the repository root:
+
+    python -m benchmarks.load_test [--sessions 8] [--turns 4] [--llm-latency 0.3] ...
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_datagov import MockDataGovServer, point_app_at  # noqa: E402
+from benchmarks.mock_llm import MockLLMServer  # noqa: E402
+from helper_functions.telemetry import percentile  # noqa: E402
+
+QUESTIONS = [
+    "How do I plan for retirement?",
+    "full retirement sum for 2020",
+    "What is the FRS and how much can I withdraw at 55?",
+    "Can I top up my retirement account?",
+    "monthly payout under RSS",
+    "Why is my payout lower than my friend's?",
+]
+
+SESSION_SCRIPT = """
+import streamlit_app
+from helper_functions.resources import get_session_store
+from helper_functions.utility import current_session_id
+
+session = get_session_store().get(current_session_id())
+if session.user_info is None:
+    session.set_user_info({"gender": "Female", "age_group": "56", "employment_status": "Employed",
+                           "topic": "Enquiry"})
+streamlit_app.render_page("Chatbot")
+"""
+
+
+def _report(label, latencies, errors, wall_seconds):
+    values = sorted(latencies)
+    throughput = len(values) / wall_seconds if wall_seconds else 0.0
+
+    def ms(q):
+        value = percentile(values, q)
+        return f"{value * 1000:8.0f}" if value is not None else f"{'-':>8}"
+
+    print(f"{label:<24} {len(values):>6} {errors:>6} {throughput:>9.1f} {ms(0.5)} {ms(0.95)} {ms(0.99)}")
+
+
+def _timed_calls(func, arguments, concurrency):
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def call(argument):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            ok = func(argument)
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            errors += not ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, arguments))
+    return latencies, errors, time.perf_counter() - start
+
+
+# Function to point this process at the stubs (before any page module is loaded)
+def configure_app(llm_url, datagov_url, data_dir, stream):
+    from helper_functions import resources
+
+    point_app_at(datagov_url, data_dir)
+    resources.STREAM_RESPONSES = stream  # Read at import; set before the pages load
+    return {"OPENAI_API_KEY": "not-used", "OPENAI_BASE_URL": llm_url, "password": "not-used"}
+
+
+def new_session(secrets):
+    from streamlit.testing.v1 import AppTest
+
+    session = AppTest.from_string(SESSION_SCRIPT, default_timeout=120)
+    for key, value in secrets.items():
+        session.secrets[key] = value
+    session.session_state["password_correct"] = True
+    return session
+
+
+# Function to send `turns` questions through a rendered session; returns (latencies, errors)
+def chat(session, index, turns):
+    latencies, errors = [], 0
+    for turn in range(turns):
+        question = QUESTIONS[(index + turn) % len(QUESTIONS)]
+        start = time.perf_counter()
+        session.chat_input[0].set_value(question).run()
+        latencies.append(time.perf_counter() - start)
+        answered = len(session.chat_message) >= 2 and session.chat_message[-1].name == "assistant"
+        errors += bool(session.exception) or not answered
+    return latencies, errors
+
+
+def _wait_for_datasets(timeout=30):
+    from helper_functions.resources import api_urls, get_dataset_cache
+
+    deadline = time.monotonic() + timeout
+    cache = get_dataset_cache()
+    while time.monotonic() < deadline:
+        if all(cache.get_data(url) is not None for url in api_urls.values()):
+            return True
+        time.sleep(0.1)
+    return False
+
+
+# Worker process: one chat session, started together with the others
+def session_worker(index, turns, llm_url, datagov_url, data_dir, stream, barrier, results):
+    try:
+        secrets = configure_app(llm_url, datagov_url, data_dir, stream)
+        # Warm up outside the measurement: the process-wide clients and caches, as the first visitor builds them
+        warm = new_session(secrets)
+        warm.run()
+        chat(warm, 0, 1)
+        _wait_for_datasets()
+
+        # Memory of one more session after a full conversation (AppTest's own objects included)
+        tracemalloc.start()
+        baseline = tracemalloc.take_snapshot()
+        session = new_session(secrets)
+        session.run()
+        barrier.wait()
+        latencies, errors = chat(session, index, turns)
+        traced = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(baseline, "filename"))
+        tracemalloc.stop()
+        # The measured session has the most messages in this process's session store
+        from helper_functions.resources import get_session_store
+
+        results.put((latencies, errors, traced, get_session_store().summary()["max_session_bytes"], None))
+    except Exception as e:
+        barrier.abort()
+        results.put(([], turns, 0, 0, f"{type(e).__name__}: {e}"))
+
+
+def run_sessions(args, llm_url, datagov_url, data_dir):
+    # Spawned workers look the target up by module name, which is "__main__" under `python -m`
+    from benchmarks.load_test import session_worker
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(args.sessions + 1)
+    results = context.Queue()
+    workers = [
+        context.Process(target=session_worker, args=(
+            index, args.turns, llm_url, datagov_url, os.path.join(data_dir, f"session-{index}"),
+            not args.no_stream, barrier, results,
+        ))
+        for index in range(args.sessions)
+    ]
+    for worker in workers:
+        worker.start()
+    barrier.wait(timeout=300)
+    start = time.perf_counter()
+    collected = [results.get(timeout=600) for _ in workers]
+    wall_seconds = time.perf_counter() - start
+    for worker in workers:
+        worker.join()
+    return collected, wall_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent chat sessions")
+    parser.add_argument("--turns", type=int, default=4, help="questions per session")
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-failure-status", type=int, default=503)
+    parser.add_argument("--data-latency", type=float, default=0.05)
+    parser.add_argument("--data-failure-rate", type=float, default=0.0)
+    parser.add_argument("--no-stream", action="store_true", help="answer with blocking calls instead of streaming")
+    args = parser.parse_args()
+
+    llm = MockLLMServer(latency=args.llm_latency, jitter=args.llm_jitter, failure_rate=args.llm_failure_rate,
+                        failure_status=args.llm_failure_status)
+    datagov = MockDataGovServer(latency=args.data_latency, failure_rate=args.data_failure_rate)
+    with llm, datagov, tempfile.TemporaryDirectory() as data_dir:
+        from helper_functions import resources
+
+        secrets = configure_app(llm.base_url, datagov.base_url, os.path.join(data_dir, "main"), not args.no_stream)
+        # Build the shared LLM client the way the app does (inside a script run, with the secrets)
+        warm = new_session(secrets)
+        warm.run()
+        chat(warm, 0, 1)
+
+        print(f"stubs: LLM {args.llm_latency * 1000:.0f} ms (+{args.llm_jitter * 1000:.0f} jitter, "
+              f"{args.llm_failure_rate:.0%} failing), data.gov.sg {args.data_latency * 1000:.0f} ms "
+              f"({args.data_failure_rate:.0%} failing)")
+        print(f"{'stage':<24} {'calls':>6} {'errors':>6} {'per sec':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+
+        calls = args.sessions * args.turns
+        urls = [list(resources.api_urls.values())[i % len(resources.api_urls)] for i in range(calls)]
+        _report("fetch_api_data", *_timed_calls(lambda url: resources.fetch_api_data(url).ok, urls, args.sessions))
+
+        from app_pages.chatbot import get_chatbot_response
+
+        questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(calls)]
+        _report("get_chatbot_response",
+                *_timed_calls(lambda question: isinstance(get_chatbot_response(question), str), questions,
+                              args.sessions))
+
+        collected, wall_seconds = run_sessions(args, llm.base_url, datagov.base_url, data_dir)
+        latencies = [latency for result in collected for latency in result[0]]
+        _report(f"chat turn ({args.sessions} sessions)", latencies, sum(result[1] for result in collected),
+                wall_seconds)
+        for result in collected:
+            if result[4]:
+                print(f"  ! session failed: {result[4]}")
+
+        measured = [result for result in collected if not result[4]]
+        if measured:
+            traced = sum(result[2] for result in measured) / len(measured)
+            state = sum(result[3] for result in measured) / len(measured)
+            print(f"memory per session after {args.turns} turns: {traced / 1024:.0f} KiB traced allocations "
+                  f"(AppTest included), {state / 1024:.1f} KiB in the session store")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""A local stub of the data.gov.sg endpoints the app reads, for offline benchmarks.
+
+It serves collection metadata (/v2/public/api/collections/<id>/metadata) and
+paged datastore_search results (/api/action/datastore_search) with synthetic
+rows shaped like the CPF datasets, answers If-None-Match revalidation with
+304, and supports the same injected latency and failures as every stub.
+point_app_at() rewrites the app's dataset URLs to the stub.
+"""
+import hashlib
+import json
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.stub_server import StubHandler, StubServer
+
+AGE_GROUPS = ["Below 21", "21-24", "25-29", "30-34", "35-39", "40-44", "45-49",
+              "50-54", "55-59", "60-64", "65-69", "70 & Over"]
+YEARS = range(2000, 2024)
+REAL_HOSTS = ("https://api-production.data.gov.sg", "https://data.gov.sg")
+
+
+# Function to build the synthetic records and fields for a resource id
+def synthetic_resource(resource_id):
+    if "members" in resource_id or resource_id.endswith("46"):
+        records = [
+            {"year": str(year), "age_group": age_group, "gender": gender,
+             "no_of_members": str(1000 + year * 3 + index * 17), "net_balance": str(2.5e6 * (index + 1) + year)}
+            for year in YEARS for index, age_group in enumerate(AGE_GROUPS) for gender in ("Male", "Female")
+        ]
+    elif "withdrawals" in resource_id or resource_id.endswith("43"):
+        records = [
+            {"year": str(year), "type_of_withdrawal": kind, "amount_withdrawn": str(1e5 * (year - 1990) + offset)}
+            for year in YEARS for offset, kind in enumerate(("Age 55", "Retirement Sum Scheme", "Others"))
+        ]
+    else:
+        records = [{"year": str(year), "amount": str(80000 + (year - 2000) * 5200)} for year in YEARS]
+    fields = [{"id": "_id", "type": "int4"}] + [{"id": name, "type": "text"} for name in records[0]]
+    return fields, [dict(record, _id=index + 1) for index, record in enumerate(records)]
+
+
+class _Handler(StubHandler):
+    def do_GET(self):
+        if not self.begin():
+            return
+        url = urlparse(self.path)
+        if url.path.endswith("/metadata"):
+            collection_id = url.path.rstrip("/").split("/")[-2]
+            body = {"code": 0, "data": {"collectionMetadata": {
+                "collectionId": collection_id, "name": f"Collection {collection_id}",
+                "childDatasets": [f"d_stub_collection_{collection_id}"],
+            }}}
+        elif url.path.endswith("/datastore_search"):
+            query = parse_qs(url.query)
+            resource_id = query.get("resource_id", [""])[0]
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query.get("limit", ["100"])[0])
+            fields, records = synthetic_resource(resource_id)
+            body = {"success": True, "result": {
+                "resource_id": resource_id, "fields": fields, "records": records[offset:offset + limit],
+                "total": len(records), "offset": offset, "limit": limit,
+            }}
+        else:
+            self.send_json({"error": "not found"}, status=404)
+            return
+
+        etag = '"' + hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_json(body, headers={"ETag": etag})
+
+
+# Function to map a real data.gov.sg URL onto a stub at base_url (same path and query)
+def stub_url(base_url, url):
+    for host in REAL_HOSTS:
+        if url.startswith(host):
+            return base_url + url[len(host):]
+    return url
+
+
+class MockDataGovServer(StubServer):
+    handler_class = _Handler
+
+    def url_for(self, url):
+        return stub_url(self.base_url, url)
+
+
+# Function to point the app's dataset URLs and datastore paging at the stub at base_url, keeping
+# its local copies in `data_dir` (never the app's own data folder). Call before any page module is loaded.
+def point_app_at(base_url, data_dir):
+    import streamlit as st
+
+    from helper_functions import ingest, resources
+
+    for name, url in list(resources.api_urls.items()):
+        resources.api_urls[name] = stub_url(base_url, url)
+    ingest.DATASTORE_SEARCH_URL = stub_url(base_url, ingest.DATASTORE_SEARCH_URL)
+
+    @st.cache_resource
+    def get_dataset_store():
+        return ingest.DatasetStore(data_dir=data_dir, max_age_seconds=resources.DATASET_TTL_SECONDS)
+
+    resources.get_dataset_store = get_dataset_store
@@ -0,0 +1,70 @@
+"""A local, OpenAI-compatible mock LLM server for offline benchmarks.
+
+It answers POST /v1/chat/completions (plain and streamed) after a fixed
+latency, echoing the last user message, so the app's clients can be pointed
+at it with `base_url` and exercised without network access or an API key.
+Failures can be injected as for every stub server (see stub_server.py).
+
+    with MockLLMServer(latency=0.5) as server:
+        client = OpenAI(api_key="not-used", base_url=server.base_url)
+"""
+import json
+import time
+
+from benchmarks.stub_server import StubHandler, StubServer
+
+
+class _Handler(StubHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.begin(body):
+            return
+
+        question = next((m["content"] for m in reversed(body.get("messages", [])) if m["role"] == "user"), "")
+        answer = f"Answer to: {question.splitlines()[-1] if question else ''}"
+        usage = {"prompt_tokens": len(question.split()), "completion_tokens": len(answer.split()),
+                 "total_tokens": len(question.split()) + len(answer.split())}
+        if body.get("stream"):
+            self._stream(body, answer, usage)
+            return
+        self.send_json({
+            "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": answer}}],
+            "usage": usage,
+        })
+
+    def _stream(self, body, answer, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        base = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": body.get("model", "mock")}
+        for word in answer.split(" "):
+            chunk = dict(base, choices=[{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}])
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            if self.stub.token_interval:
+                time.sleep(self.stub.token_interval)
+        self.wfile.write(f"data: {json.dumps(dict(base, choices=[], usage=usage))}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+
+class MockLLMServer(StubServer):
+    """OpenAI-compatible stub; `token_interval` spaces out the streamed words."""
+
+    handler_class = _Handler
+
+    def __init__(self, latency=0.5, token_interval=0.0, **kwargs):
+        super().__init__(latency=latency, **kwargs)
+        self.token_interval = token_interval
+
+    @property
+    def base_url(self):
+        return f"{super().base_url}/v1"
+
+    @property
+    def requests(self):
+        return [body for _method, _path, body in super().requests]
@@ -0,0 +1,107 @@
+"""Base for the local stub servers used by the offline benchmarks.
+
+A StubServer runs on a free local port in a background thread. Every request
+waits `latency` seconds (plus up to `jitter`), and a `failure_rate` share of
+them fail with `failure_status` (e.g. 503, or 429 with a Retry-After header),
+so timeouts, retries and backoff can be exercised without network access.
+"""
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    # Clients hanging up early (timeouts, cancelled streams) are expected, not errors
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def stub(self):
+        return self.server.stub
+
+    # Apply the injected latency and failures; returns False if the request was failed
+    def begin(self, body=None):
+        self.stub._log(self.command, self.path, body)
+        self.stub._wait()
+        if self.stub._should_fail():
+            payload = json.dumps({"error": {"message": "injected failure", "type": "stub"}}).encode()
+            self.send_response(self.stub.failure_status)
+            if self.stub.failure_status == 429:
+                self.send_header("Retry-After", "1")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return False
+        return True
+
+    def send_json(self, data, status=200, headers=None):
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class StubServer:
+    """Runs a StubHandler subclass on a free local port in a background thread."""
+
+    handler_class = StubHandler
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, failure_status=503, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._requests = []
+        self._server = _Server(("127.0.0.1", 0), self.handler_class)
+        self._server.stub = self
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def requests(self):
+        with self._lock:
+            return list(self._requests)
+
+    def _log(self, method, path, body):
+        with self._lock:
+            self._requests.append((method, path, body))
+
+    def _wait(self):
+        with self._lock:
+            delay = self.latency + (self._random.random() * self.jitter if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+    def _should_fail(self):
+        with self._lock:
+            return self.failure_rate > 0 and self._random.random() < self.failure_rate
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,318 @@
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from openai import APIConnectionError
+
+from helper_functions.telemetry import telemetry
+
+# """
+# This file contains the admission controller in front of the OpenAI calls.
+# Every call from every session passes through one process-wide controller:
+# a token bucket caps the request rate, a semaphore caps the calls in flight,
+# each session has a quota of calls per minute, and callers that cannot go
+# at once wait in a bounded FIFO queue (and are told their position). A 429
+# from OpenAI pauses admissions for its Retry-After (or an exponential
+# backoff) and the call is retried, so bursts queue up instead of failing.
+# Server errors and dropped connections are retried too, after a backoff of
+# their own. The controller owns every retry: the OpenAI clients behind it
+# are built with max_retries=0, so retries never stack.
+# """
+
+RATE_PER_SECOND = 5.0
+BURST = 10
+MAX_CONCURRENT = 8
+MAX_QUEUE = 32
+QUEUE_TIMEOUT_SECONDS = 30.0
+SESSION_CALLS_PER_WINDOW = 20
+SESSION_WINDOW_SECONDS = 60.0
+RATE_LIMIT_RETRIES = 3
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+
+
+class AdmissionRejected(Exception):
+    """A call that was not admitted: the queue is full, the session is over its quota, or it waited too long."""
+
+    MESSAGES = {
+        "queue_full": "The assistant is very busy right now.",
+        "session_quota": "You have sent a lot of questions in a short time.",
+        "timeout": "The assistant is very busy right now.",
+        "rate_limited": "The assistant is receiving too many requests right now.",
+    }
+
+    def __init__(self, reason, retry_after=None):
+        self.reason = reason
+        self.retry_after = retry_after
+        message = self.MESSAGES.get(reason, "The assistant is busy right now.")
+        if retry_after:
+            message += f" Please try again in about {max(1, round(retry_after))} seconds."
+        else:
+            message += " Please try again shortly."
+        super().__init__(message)
+
+
+# Function to tell whether an OpenAI error is a 429 (rate limit) response
+def is_rate_limited(error):
+    return getattr(error, "status_code", None) == 429
+
+
+# Function to tell whether an OpenAI error is worth retrying without pausing everyone (5xx, connection lost)
+def is_transient(error):
+    status = getattr(error, "status_code", None)
+    return (status is not None and status >= 500) or isinstance(error, APIConnectionError)
+
+
+# Function to tell whether an error concerns only the caller's own session (so it is not shared with others)
+def is_session_rejection(error):
+    return isinstance(error, AdmissionRejected) and error.reason == "session_quota"
+
+
+# Function to read the server's Retry-After (seconds) from a 429 error, if it sent one
+def retry_after_seconds(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass  # An HTTP date; fall back to the exponential backoff
+    return None
+
+
+class TokenBucket:
+    """Refills at `rate` tokens per second up to `capacity`. Not locked: the controller holds its own lock."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Seconds until `cost` tokens are available (0 if they are now)
+    def wait_time(self, cost, now):
+        self._refill(now)
+        missing = min(cost, self.capacity) - self.tokens
+        return max(missing / self.rate, 0.0) if self.rate > 0 else 0.0
+
+    def take(self, cost, now):
+        self._refill(now)
+        self.tokens -= min(cost, self.capacity)
+
+
+class AdmissionController:
+    """Process-wide admission for upstream calls: rate, concurrency, per-session quota and a bounded queue."""
+
+    def __init__(self, rate_per_second=RATE_PER_SECOND, burst=BURST, max_concurrent=MAX_CONCURRENT,
+                 max_queue=MAX_QUEUE, queue_timeout_seconds=QUEUE_TIMEOUT_SECONDS,
+                 session_calls=SESSION_CALLS_PER_WINDOW, session_window_seconds=SESSION_WINDOW_SECONDS,
+                 rate_limit_retries=RATE_LIMIT_RETRIES, backoff_seconds=BACKOFF_SECONDS,
+                 max_backoff_seconds=MAX_BACKOFF_SECONDS):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.session_calls = session_calls
+        self.session_window_seconds = session_window_seconds
+        self.rate_limit_retries = rate_limit_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._bucket = TokenBucket(rate_per_second, burst)
+        self._condition = threading.Condition(threading.Lock())
+        self._queue = deque()  # Tickets of the waiting callers, first come first served
+        self._active = 0
+        self._paused_until = 0.0  # Set by a 429: nothing is admitted before then
+        self._session_calls = {}  # session id -> deque of the times its calls were asked for, within the window
+        self.stats = {"admitted": 0, "queued": 0, "rejected": {}, "rate_limited": 0, "retried": 0,
+                      "wait_seconds": 0.0}
+
+    # Function to hold slots for `cost` upstream calls: `with controller.admit(session_id, on_wait=...):`
+    # on_wait(position) is called while queued (1 = next in line) and on_wait(0) once admitted after waiting.
+    # A batch of calls (e.g. a prompt chain) takes `cost` of the rate, of the concurrency and of the session quota at once.
+    @contextmanager
+    def admit(self, session_id=None, cost=1, on_wait=None, queue_timeout_seconds=None):
+        slots = min(cost, self.max_concurrent)  # A batch larger than the limit runs alone
+        self._acquire(session_id, cost, slots, on_wait,
+                      self.queue_timeout_seconds if queue_timeout_seconds is None else queue_timeout_seconds)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= slots
+                self._condition.notify_all()
+
+    def _reject(self, reason, retry_after=None):
+        self.stats["rejected"][reason] = self.stats["rejected"].get(reason, 0) + 1
+        telemetry.increment("llm_admission", outcome=reason)
+        raise AdmissionRejected(reason, retry_after)
+
+    # Seconds until the head of the queue may go (0 if now), or None to wait for a release
+    def _ready_in(self, ticket, cost, slots, now):
+        if self._queue[0] is not ticket or self._active + slots > self.max_concurrent:
+            return None
+        if self._paused_until > now:
+            return self._paused_until - now
+        return self._bucket.wait_time(cost, now)
+
+    def _acquire(self, session_id, cost, slots, on_wait, queue_timeout_seconds):
+        start = time.monotonic()
+        deadline = start + queue_timeout_seconds
+        with self._condition:
+            calls = None
+            charge = min(cost, self.session_calls)  # A batch counts as `cost` calls; one larger than the quota needs all of it
+            if session_id is not None:
+                calls = self._session_calls.setdefault(session_id, deque())
+                while calls and calls[0] <= start - self.session_window_seconds:
+                    calls.popleft()
+                over = len(calls) + charge - self.session_calls
+                if over > 0:
+                    self._reject("session_quota", calls[over - 1] + self.session_window_seconds - start)
+            if len(self._queue) >= self.max_queue:
+                self._reject("queue_full", self.queue_timeout_seconds)
+            if calls is not None:
+                calls.extend([start] * charge)  # Counted from the moment it is asked, so a queued burst cannot exceed it
+                self._forget_idle_sessions(start)
+
+            ticket = object()
+            self._queue.append(ticket)
+            last_position = None
+            queued = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._ready_in(ticket, cost, slots, now)
+                    if wait == 0:
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._reject("timeout", max(self._paused_until - now, 1.0))
+                    queued = True
+                    position = self._queue.index(ticket) + 1
+                    if on_wait is not None and position != last_position:
+                        last_position = position
+                        # Never hold the lock while the caller updates its UI
+                        self._condition.release()
+                        try:
+                            on_wait(position)
+                        finally:
+                            self._condition.acquire()
+                        continue
+                    self._condition.wait(remaining if wait is None else min(wait, remaining))
+            except BaseException:
+                self._queue.remove(ticket)
+                if calls is not None:
+                    for _ in range(charge):
+                        calls.remove(start)  # A call that never ran does not use up the quota
+                self._condition.notify_all()
+                raise
+
+            self._queue.popleft()
+            self._bucket.take(cost, now)
+            self._active += slots
+            waited = now - start
+            self.stats["admitted"] += 1
+            self.stats["wait_seconds"] += waited
+            if queued:
+                self.stats["queued"] += 1
+            self._condition.notify_all()  # The next in line may be able to go too
+        telemetry.increment("llm_admission", outcome="queued" if queued else "admitted")
+        if telemetry.enabled:
+            telemetry.observe("llm.queue_wait", waited)
+        if last_position is not None:
+            on_wait(0)
+
+    def _forget_idle_sessions(self, now):
+        # Sessions with no call inside the window no longer need their timestamps
+        if len(self._session_calls) > 4 * self.max_queue:
+            cutoff = now - self.session_window_seconds
+            for session_id in [sid for sid, calls in self._session_calls.items() if not calls or calls[-1] <= cutoff]:
+                del self._session_calls[session_id]
+
+    def _backoff_delay(self, attempt):
+        return min(self.backoff_seconds * 2 ** attempt * random.uniform(0.5, 1.0), self.max_backoff_seconds)
+
+    # Function to pause every admission after a 429: Retry-After if given, else exponential backoff with jitter
+    def back_off(self, error, attempt):
+        delay = retry_after_seconds(error)
+        delay = self._backoff_delay(attempt) if delay is None else min(delay, self.max_backoff_seconds)
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self.stats["rate_limited"] += 1
+            self._condition.notify_all()
+        telemetry.increment("llm_rate_limited")
+        return delay
+
+    # Function to decide on a failed attempt: the seconds to wait before the next one, or None to give up
+    def _retry_delay(self, error, attempt):
+        if not (is_rate_limited(error) or is_transient(error)):
+            return None
+        if attempt == self.rate_limit_retries:
+            if is_rate_limited(error):
+                with self._condition:
+                    self._reject("rate_limited", retry_after_seconds(error) or self.backoff_seconds)
+            return None
+        with self._condition:
+            self.stats["retried"] += 1
+        if is_rate_limited(error):
+            self.back_off(error, attempt)  # Everyone waits; the retry queues up behind the pause
+            return 0.0
+        telemetry.increment("llm_retried")
+        return self._backoff_delay(attempt)  # This caller alone waits, without holding a slot
+
+    # Function to run one upstream call under admission, retrying it after a 429, a 5xx or a lost connection
+    def call(self, func, session_id=None, cost=1, on_wait=None):
+        for attempt in range(self.rate_limit_retries + 1):
+            # A retry is the same question: it does not count against the session's quota again
+            with self.admit(session_id if attempt == 0 else None, cost, on_wait):
+                try:
+                    return func()
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+            time.sleep(delay)
+
+    # Generator: stream an upstream call under admission (the slot is held until the stream ends).
+    # A failure before the first chunk is retried as in call(); once text has been shown, errors are raised.
+    def stream(self, make_stream, session_id=None, on_wait=None):
+        for attempt in range(self.rate_limit_retries + 1):
+            with self.admit(session_id if attempt == 0 else None, 1, on_wait):
+                started = False
+                stream = None
+                try:
+                    stream = make_stream()
+                    for chunk in stream:
+                        started = True
+                        yield chunk
+                    return
+                except Exception as e:
+                    if started:
+                        raise
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+                finally:
+                    if stream is not None:
+                        stream.close()
+            time.sleep(delay)
+
+    def summary(self):
+        with self._condition:
+            admitted = self.stats["admitted"]
+            return {
+                "active": self._active,
+                "waiting": len(self._queue),
+                "admitted": admitted,
+                "queued": self.stats["queued"],
+                "rejected": dict(self.stats["rejected"]),
+                "rate_limited": self.stats["rate_limited"],
+                "retried": self.stats["retried"],
+                "average_wait": self.stats["wait_seconds"] / admitted if admitted else None,
+                "paused_for": max(self._paused_until - time.monotonic(), 0.0),
+            }
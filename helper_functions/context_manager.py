@@ -0,0 +1,124 @@
+import re
+from functools import lru_cache
+
+# """
+# This file contains the conversation context manager for the chatbot.
+# It keeps the turns of a session that fit a token budget (counted with
+# tiktoken) and folds older turns into a short running summary, so the
+# history sent to OpenAI stays bounded however long the session runs.
+# """
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+DEFAULT_MAX_TOKENS = 1500  # History budget, on top of the system prompt and current question
+DEFAULT_SUMMARY_TOKENS = 250
+SUMMARY_SNIPPET_CHARS = 160
+MESSAGE_OVERHEAD_TOKENS = 4  # Role and separators the chat format adds per message
+
+
+@lru_cache(maxsize=None)
+def _encoding(model):
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # tiktoken downloads its BPE files on first use; estimate if that is not possible
+        return None
+
+
+# Function to count the tokens of a piece of text for the given model
+def count_tokens(text, model=DEFAULT_MODEL):
+    encoding = _encoding(model)
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _snippet(text, limit=SUMMARY_SNIPPET_CHARS):
+    text = re.sub(r"\s+", " ", text).strip()
+    # Keep the first sentence, cut to the limit
+    first_sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+    return first_sentence if len(first_sentence) <= limit else first_sentence[:limit - 1].rstrip() + "…"
+
+
+class ConversationTurn:
+    __slots__ = ("user", "assistant", "tokens")
+
+    def __init__(self, user, assistant, tokens):
+        self.user = user
+        self.assistant = assistant
+        self.tokens = tokens
+
+
+class ConversationContext:
+    """Recent turns within a token budget plus a running summary of older ones."""
+
+    def __init__(self, max_tokens=DEFAULT_MAX_TOKENS, summary_tokens=DEFAULT_SUMMARY_TOKENS,
+                 model=DEFAULT_MODEL):
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.model = model
+        self.turns = []
+        self.summary_lines = []
+        self._summary_token_count = 0
+
+    @property
+    def tokens(self):
+        return sum(turn.tokens for turn in self.turns) + self._summary_token_count
+
+    # Function to add a completed turn (the raw question, not the structured prompt)
+    def add_turn(self, user, assistant):
+        tokens = (count_tokens(user, self.model) + count_tokens(assistant, self.model)
+                  + 2 * MESSAGE_OVERHEAD_TOKENS)
+        self.turns.append(ConversationTurn(user, assistant, tokens))
+        self._fit_budget()
+
+    # Function to get the context as JSON-safe data (for the session store's spill file)
+    def to_dict(self):
+        return {
+            "max_tokens": self.max_tokens,
+            "summary_tokens": self.summary_tokens,
+            "model": self.model,
+            "turns": [[turn.user, turn.assistant, turn.tokens] for turn in self.turns],
+            "summary_lines": list(self.summary_lines),
+            "summary_token_count": self._summary_token_count,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        context = cls(max_tokens=data["max_tokens"], summary_tokens=data["summary_tokens"], model=data["model"])
+        context.turns = [ConversationTurn(user, assistant, tokens) for user, assistant, tokens in data["turns"]]
+        context.summary_lines = list(data["summary_lines"])
+        context._summary_token_count = data["summary_token_count"]
+        return context
+
+    def summary(self):
+        if not self.summary_lines:
+            return None
+        return "Summary of the earlier conversation:\n" + "\n".join(self.summary_lines)
+
+    # Function to build the messages for a request: system prompt, summary, recent turns, current input
+    def build_messages(self, system_prompt, user_content):
+        messages = [{"role": "system", "content": system_prompt}]
+        summary = self.summary()
+        if summary:
+            messages.append({"role": "system", "content": summary})
+        for turn in self.turns:
+            messages.append({"role": "user", "content": turn.user})
+            messages.append({"role": "assistant", "content": turn.assistant})
+        messages.append({"role": "user", "content": user_content})
+        return messages
+
+    # Fold the oldest turns into the summary until the history fits the budget
+    def _fit_budget(self):
+        while self.turns and self.tokens > self.max_tokens:
+            turn = self.turns.pop(0)
+            line = f"- User asked: {_snippet(turn.user)} Advisor answered: {_snippet(turn.assistant)}"
+            self.summary_lines.append(line)
+            self._summary_token_count += count_tokens(line, self.model) + 1
+            # The summary itself is bounded too: forget its oldest lines first
+            while self.summary_lines and self._summary_token_count > self.summary_tokens:
+                dropped = self.summary_lines.pop(0)
+                self._summary_token_count -= count_tokens(dropped, self.model) + 1
@@ -0,0 +1,101 @@
+import altair as alt
+import pandas as pd
+
+from helper_functions.retrieval import column_kind
+
+# """
+# This file contains the data dashboard: aggregates of the CPF datasets and
+# the Altair charts drawn from them. Aggregates are computed once per dataset
+# version with vectorised pandas group-bys, so charts never touch the raw rows.
+# """
+
+MAX_SERIES_CATEGORIES = 12  # A text column with more distinct values is not used to split series
+
+
+def _columns_by_kind(frame):
+    columns = {}
+    for column in frame.columns:
+        kind = column_kind(column)
+        if kind and kind not in columns:
+            columns[kind] = column
+    return columns
+
+
+def _measures(frame, exclude):
+    return [
+        column for column in frame.columns
+        if column not in exclude and column != "_id" and pd.api.types.is_numeric_dtype(frame[column])
+    ]
+
+
+def _series_column(frame, exclude):
+    for column in frame.columns:
+        if column in exclude or pd.api.types.is_numeric_dtype(frame[column]):
+            continue
+        if frame[column].nunique(dropna=True) <= MAX_SERIES_CATEGORIES:
+            return column
+    return None
+
+
+# Function to compute the per-year trend and per age group/gender breakdown of one dataset
+def aggregate_dataset(frame):
+    """Returns {"trend": long DataFrame or None, "by_group": long DataFrame or None}."""
+    result = {"trend": None, "by_group": None}
+    if frame is None or frame.empty:
+        return result
+
+    kinds = _columns_by_kind(frame)
+    year, age, gender = kinds.get("year"), kinds.get("age"), kinds.get("gender")
+    measures = _measures(frame, exclude=set(kinds.values()))
+    if not measures:
+        return result
+
+    if year:
+        series = _series_column(frame, exclude={year, age, gender})
+        keys = [year] + ([series] if series else [])
+        trend = frame.groupby(keys, sort=True, observed=True)[measures].sum().reset_index()
+        trend = trend.melt(id_vars=keys, value_vars=measures, var_name="measure", value_name="value")
+        trend["series"] = (
+            trend["measure"] + " (" + trend[series].astype(str) + ")" if series else trend["measure"]
+        )
+        result["trend"] = trend.rename(columns={year: "year"})[["year", "series", "measure", "value"]]
+
+    if age or gender:
+        latest = frame[frame[year] == frame[year].max()] if year else frame
+        keys = [column for column in (age, gender) if column]
+        by_group = latest.groupby(keys, sort=True, observed=True)[measures].sum().reset_index()
+        by_group = by_group.melt(id_vars=keys, value_vars=measures, var_name="measure", value_name="value")
+        result["by_group"] = by_group.rename(columns={age: "age_group", gender: "gender"})
+
+    return result
+
+
+# Function to aggregate every dataset: {dataset name: aggregate_dataset(frame)}
+def compute_aggregates(frames):
+    return {name: aggregate_dataset(frame) for name, frame in frames.items()}
+
+
+# Function to draw a line chart of each measure per year
+def trend_chart(trend, title):
+    return alt.Chart(trend, title=title).mark_line(point=True).encode(
+        x=alt.X("year:O", title="Year"),
+        y=alt.Y("value:Q", title=None),
+        color=alt.Color("series:N", title=None),
+        tooltip=["year:O", "series:N", alt.Tooltip("value:Q", format=",")],
+    )
+
+
+# Function to draw a grouped bar chart of one measure by age group and gender
+def group_chart(by_group, measure, title):
+    data = by_group[by_group["measure"] == measure]
+    x_field = "age_group" if "age_group" in data.columns else "gender"
+    encoding = {
+        "x": alt.X(f"{x_field}:N", title=x_field.replace("_", " ").title()),
+        "y": alt.Y("value:Q", title=measure.replace("_", " ").title()),
+        "tooltip": [f"{x_field}:N", alt.Tooltip("value:Q", format=",")],
+    }
+    if "gender" in data.columns and x_field != "gender":
+        encoding["color"] = alt.Color("gender:N", title="Gender")
+        encoding["xOffset"] = "gender:N"
+        encoding["tooltip"].insert(1, "gender:N")
+    return alt.Chart(data, title=title).mark_bar().encode(**encoding)
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+
+import pytz
+
+from helper_functions.http_fetch import fetch_all
+
+# """
+# This file contains the process-wide cache for the data.gov.sg datasets.
+# Page renders only ever read from the cache; a background refresher thread
+# does all the network work (first fetch, ETag/Last-Modified revalidation
+# and refresh of stale entries).
+# """
+
+SGT = pytz.timezone("Asia/Singapore")
+
+DEFAULT_TTL_SECONDS = 60 * 60  # Serve a dataset for an hour before revalidating it
+
+
+def _content_hash(data):
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class CachedDataset:
+    """A single dataset held in the cache, with the validators needed to revalidate it."""
+
+    def __init__(self, url, data, etag=None, last_modified=None, fetched_at=None, version=None):
+        self.url = url
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        # Identifies the content, so dependants (e.g. cached answers) know when it changed
+        self.version = version or etag or last_modified or _content_hash(data)
+        # Time (epoch seconds) the data was last confirmed fresh with data.gov.sg
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    def age(self, now=None):
+        return (now if now is not None else time.time()) - self.fetched_at
+
+    def fetched_at_sgt(self):
+        return datetime.fromtimestamp(self.fetched_at, SGT)
+
+
+class DatasetCache:
+    """Thread-safe cache of dataset JSON keyed by URL, with stale-while-revalidate."""
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, fetch_many=fetch_all, poll_seconds=30):
+        self.ttl_seconds = ttl_seconds
+        self.poll_seconds = poll_seconds
+        self._fetch_many = fetch_many
+        self._entries = {}
+        self._errors = {}
+        self._urls = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Register the URLs to keep warm and start the background refresher
+    def start(self, urls):
+        with self._lock:
+            for url in urls:
+                if url not in self._urls:
+                    self._urls.append(url)
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="dataset-cache-refresher", daemon=True
+                )
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    # Never blocks: returns the cached entry (possibly stale) or None on a cold cache
+    def get(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+            if url not in self._urls:
+                self._urls.append(url)
+        if entry is None or self.is_stale(entry):
+            self._wake.set()  # Let the refresher pick it up
+        return entry
+
+    def get_data(self, url):
+        entry = self.get(url)
+        return entry.data if entry is not None else None
+
+    def last_error(self, url):
+        with self._lock:
+            error = self._errors.get(url)
+        return error[0] if error else None
+
+    def is_stale(self, entry, now=None):
+        return entry.age(now) >= self.ttl_seconds
+
+    # The "data as at" time is the oldest fetch among the given datasets
+    def data_as_at(self, urls):
+        with self._lock:
+            entries = [self._entries.get(url) for url in urls]
+        if not entries or any(entry is None for entry in entries):
+            return None
+        return min(entries, key=lambda entry: entry.fetched_at).fetched_at_sgt()
+
+    # Combined content version of the given datasets (None until all are cached)
+    def version(self, urls):
+        with self._lock:
+            entries = [self._entries.get(url) for url in urls]
+        if not entries or any(entry is None for entry in entries):
+            return None
+        return tuple(entry.version for entry in entries)
+
+    # Fetch or revalidate a single URL and store the result
+    def refresh(self, url):
+        return self.refresh_many([url])[url]
+
+    # Fetch or revalidate several URLs concurrently; a failure keeps the stale copy
+    def refresh_many(self, urls):
+        with self._lock:
+            current = {url: self._entries.get(url) for url in urls}
+        validators = {
+            url: (entry.etag, entry.last_modified)
+            for url, entry in current.items() if entry is not None
+        }
+        results = self._fetch_many(list(current), validators=validators)
+
+        refreshed = {}
+        with self._lock:
+            for url, result in results.items():
+                previous = current.get(url)
+                if not result.ok:
+                    # Keep serving the stale copy; retry on the next poll
+                    self._errors[url] = (result.error, time.time())
+                    refreshed[url] = previous
+                    continue
+                if result.not_modified and previous is not None:
+                    entry = CachedDataset(url, previous.data, result.etag, result.last_modified,
+                                          version=previous.version)
+                else:
+                    entry = CachedDataset(url, result.data, result.etag, result.last_modified)
+                self._entries[url] = entry
+                self._errors.pop(url, None)
+                refreshed[url] = entry
+        return refreshed
+
+    def _due_urls(self):
+        now = time.time()
+        with self._lock:
+            return [
+                url for url in self._urls
+                if (url not in self._entries or self.is_stale(self._entries[url], now))
+                # Back off from a failing URL until the next poll
+                and now - self._errors.get(url, ("", 0))[1] >= self.poll_seconds
+            ]
+
+    def _run(self):
+        while not self._stop.is_set():
+            due = self._due_urls()
+            if due:
+                self.refresh_many(due)
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
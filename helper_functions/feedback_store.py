@@ -0,0 +1,255 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pytz
+
+from helper_functions.sentiment import score_batch
+
+# """
+# This file contains the feedback store. Submissions go onto an in-memory
+# queue and return at once; a single writer thread drains the queue in
+# batches, scores each batch for sentiment and topic, and writes it into a
+# local SQLite database in WAL mode, so many sessions can submit (and read
+# the summaries) without waiting on the disk, the scoring or each other.
+# Items that cannot be written are appended to a JSON-lines file next to the
+# database instead of being lost, and the writer keeps running.
+# """
+
+logger = logging.getLogger(__name__)
+
+SGT = pytz.timezone("Asia/Singapore")
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "feedback.sqlite3")
+BATCH_SIZE = 200
+BATCH_WAIT_SECONDS = 0.5  # How long the writer waits to fill a batch after the first item
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    created_date TEXT NOT NULL,
+    feedback_type TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    session_id TEXT
+);
+CREATE INDEX IF NOT EXISTS feedback_type_date ON feedback (feedback_type, created_date);
+"""
+
+# Columns added after the first release of the table (added in place to existing databases)
+SCORE_COLUMNS = {"sentiment": "REAL", "sentiment_label": "TEXT", "topic": "TEXT"}
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL; one fsync per checkpoint
+    connection.execute("PRAGMA busy_timeout=30000")
+    return connection
+
+
+class FeedbackStore:
+    """Feedback persistence with a non-blocking, batched writer."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, batch_size=BATCH_SIZE, batch_wait_seconds=BATCH_WAIT_SECONDS,
+                 scorer=score_batch):
+        self.path = path
+        self.failed_path = os.path.splitext(path)[0] + ".failed.jsonl"
+        self.batch_size = batch_size
+        self.batch_wait_seconds = batch_wait_seconds
+        self.scorer = scorer
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        connection = _connect(path)
+        try:
+            with connection:
+                connection.executescript(SCHEMA)
+                existing = {row[1] for row in connection.execute("PRAGMA table_info(feedback)")}
+                for column, column_type in SCORE_COLUMNS.items():
+                    if column not in existing:
+                        connection.execute(f"ALTER TABLE feedback ADD COLUMN {column} {column_type}")
+        finally:
+            connection.close()
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self.stats = {"submitted": 0, "written": 0, "batches": 0, "errors": 0, "failed": 0}
+        self._thread = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # Never blocks: queues the feedback for the writer thread
+    def submit(self, feedback_type, rating, message, session_id=None):
+        now = time.time()
+        created_date = datetime.fromtimestamp(now, SGT).strftime("%Y-%m-%d")
+        self._queue.put((now, created_date, feedback_type, int(rating), message, session_id))
+        self.stats["submitted"] += 1
+
+    # Wait until everything submitted so far is on disk (or the timeout passes)
+    def flush(self, timeout=10):
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def close(self, timeout=10):
+        if self._stop.is_set():
+            return
+        self.flush(timeout)
+        self._stop.set()
+        self._queue.put(None)  # Wake the writer so it can exit
+        self._thread.join(timeout)
+
+    def _next_batch(self):
+        item = self._queue.get()
+        if item is None:
+            self._queue.task_done()
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.batch_wait_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.task_done()
+                self._stop.set()
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        connection = _connect(self.path)
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+                try:
+                    self._write_or_keep(connection, batch)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+                if self._stop.is_set() and self._queue.empty():
+                    break
+        finally:
+            connection.close()
+
+    # Write a batch; if that fails, write its items one by one and keep the ones that still fail
+    def _write_or_keep(self, connection, batch):
+        try:
+            self._write(connection, batch)
+            return
+        except Exception:
+            self.stats["errors"] += 1
+            logger.exception("Could not write a batch of %d feedback items", len(batch))
+        if len(batch) == 1:
+            self._keep(batch)
+            return
+        failed = []
+        for item in batch:
+            try:
+                self._write(connection, [item])
+            except Exception:
+                failed.append(item)
+        self._keep(failed)
+
+    # Append items that could not be written to the failed file, to be looked at (and re-imported) later
+    def _keep(self, items):
+        if not items:
+            return
+        self.stats["failed"] += len(items)
+        try:
+            with open(self.failed_path, "a", encoding="utf-8") as f:
+                for item in items:
+                    f.write(json.dumps(item) + "\n")  # ASCII-escaped, so even lone surrogates are kept
+        except Exception:
+            logger.exception("Could not keep %d failed feedback items in %s", len(items), self.failed_path)
+
+    def _write(self, connection, batch):
+        # Score the whole batch at once, off the request path; a scoring failure never loses feedback
+        scores = [None] * len(batch)
+        if self.scorer:
+            try:
+                scores = self.scorer([item[4] for item in batch])
+            except Exception:
+                self.stats["errors"] += 1
+        rows = [
+            item + ((score.sentiment, score.label, score.topic) if score else (None, None, None))
+            for item, score in zip(batch, scores)
+        ]
+        # Retry the batch a few times if another process holds the write lock for long
+        for attempt in range(3):
+            try:
+                with connection:
+                    connection.executemany(
+                        "INSERT INTO feedback (created_at, created_date, feedback_type, rating, message, session_id, "
+                        "sentiment, sentiment_label, topic) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                self.stats["written"] += len(batch)
+                self.stats["batches"] += 1
+                return
+            except sqlite3.OperationalError:
+                if attempt == 2:
+                    raise
+                self.stats["errors"] += 1
+                time.sleep(0.1 * (attempt + 1))
+
+    def _where(self, start_date, end_date, feedback_type):
+        clauses, params = [], []
+        if start_date:
+            clauses.append("created_date >= ?")
+            params.append(str(start_date))
+        if end_date:
+            clauses.append("created_date <= ?")
+            params.append(str(end_date))
+        if feedback_type:
+            clauses.append("feedback_type = ?")
+            params.append(feedback_type)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def _query(self, sql, params):
+        connection = _connect(self.path)
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    # Function to count feedback and average the rating and sentiment by type and date
+    def summary(self, start_date=None, end_date=None, feedback_type=None):
+        """Returns [{"feedback_type", "date", "count", "average_rating", "average_sentiment"}] (dates as YYYY-MM-DD, SGT)."""
+        where, params = self._where(start_date, end_date, feedback_type)
+        rows = self._query(
+            "SELECT feedback_type, created_date, COUNT(*), AVG(rating), AVG(sentiment) FROM feedback "
+            f"{where} GROUP BY feedback_type, created_date ORDER BY created_date, feedback_type",
+            params,
+        )
+        return [
+            {"feedback_type": row[0], "date": row[1], "count": row[2], "average_rating": round(row[3], 2),
+             "average_sentiment": round(row[4], 3) if row[4] is not None else None}
+            for row in rows
+        ]
+
+    # Function to count feedback by topic and sentiment label
+    def topic_summary(self, start_date=None, end_date=None, feedback_type=None):
+        """Returns [{"topic", "sentiment_label", "count", "average_rating"}], most frequent first."""
+        where, params = self._where(start_date, end_date, feedback_type)
+        rows = self._query(
+            "SELECT topic, sentiment_label, COUNT(*), AVG(rating) FROM feedback "
+            f"{where} GROUP BY topic, sentiment_label ORDER BY COUNT(*) DESC",
+            params,
+        )
+        return [
+            {"topic": row[0], "sentiment_label": row[1], "count": row[2], "average_rating": round(row[3], 2)}
+            for row in rows
+        ]
@@ -0,0 +1,190 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from tenacity import (
+    Retrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+
+from helper_functions.single_flight import SingleFlight
+from helper_functions.telemetry import telemetry
+
+# """
+# This file contains the HTTP fetch layer for the data.gov.sg datasets.
+# All requests share one keep-alive Session, run concurrently on a small
+# thread pool, time out, and retry transient failures with backoff.
+# Concurrent requests for the same URL (and validators) share one fetch.
+# """
+
+CONNECT_TIMEOUT_SECONDS = 3.05
+READ_TIMEOUT_SECONDS = 10
+MAX_ATTEMPTS = 3
+POOL_SIZE = 8  # Connections kept alive per host, and fetch worker threads
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    """Outcome of fetching one URL. `error` is set instead of raising."""
+
+    url: str
+    status: Optional[int] = None
+    data: Any = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    attempts: int = 0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+
+class RetryableStatusError(Exception):
+    """Raised for status codes worth retrying (rate limits and server errors)."""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+_session = None
+_executor = None
+_lock = threading.Lock()
+_flights = SingleFlight("dataset_fetch")
+
+
+# Function to normalise a URL for coalescing (host case and query parameter order do not matter)
+def normalize_url(url):
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, ""))
+
+
+# Function to get the process-wide Session (created on first use)
+def get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="http-fetch")
+        return _executor
+
+
+# Function to fetch one URL, revalidating with the given ETag/Last-Modified if provided
+def fetch_url(url, etag=None, last_modified=None, session=None,
+              timeout=(CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS), max_attempts=MAX_ATTEMPTS):
+    if session is not None:
+        return _timed_fetch(url, etag, last_modified, session, timeout, max_attempts)
+    # Requests on the shared session made while an identical one is in flight wait for its result
+    return _flights.do((normalize_url(url), etag, last_modified),
+                       lambda: _timed_fetch(url, etag, last_modified, None, timeout, max_attempts))
+
+
+def _timed_fetch(url, etag, last_modified, session, timeout, max_attempts):
+    result = _fetch_url(url, etag, last_modified, session, timeout, max_attempts)
+    if telemetry.enabled:
+        attributes = {"status": result.status, "attempts": result.attempts}
+        if result.error is not None:
+            attributes["error"] = result.error
+        telemetry.observe("dataset.fetch", result.elapsed, **attributes)
+        telemetry.increment("dataset_fetches", status=result.status or "failed")
+    return result
+
+
+def _fetch_url(url, etag, last_modified, session, timeout, max_attempts):
+    session = session or get_session()
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    retrying = Retrying(
+        stop=stop_after_attempt(max_attempts),
+        wait=wait_exponential_jitter(initial=0.5, max=4),
+        retry=retry_if_exception_type(
+            (RetryableStatusError, requests.ConnectionError, requests.Timeout)
+        ),
+        reraise=True,
+    )
+
+    def attempt():
+        response = session.get(url, headers=headers, timeout=timeout)
+        telemetry.increment("dataset_fetch_bytes", len(response.content))
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            raise RetryableStatusError(response.status_code)
+        return response
+
+    start = time.perf_counter()
+    try:
+        response = retrying(attempt)
+    except Exception as e:
+        return FetchResult(
+            url=url,
+            status=getattr(e, "status_code", None),
+            error=str(e) or type(e).__name__,
+            elapsed=time.perf_counter() - start,
+            attempts=retrying.statistics.get("attempt_number", 1),
+        )
+    attempts = retrying.statistics.get("attempt_number", 1)
+
+    if response.status_code == 304:
+        return FetchResult(url=url, status=304, etag=etag, last_modified=last_modified,
+                           elapsed=time.perf_counter() - start, attempts=attempts)
+    if response.status_code != 200:
+        return FetchResult(url=url, status=response.status_code,
+                           error=f"Failed to fetch data from {url} (HTTP {response.status_code})",
+                           elapsed=time.perf_counter() - start, attempts=attempts)
+    try:
+        data = response.json()
+    except ValueError as e:
+        return FetchResult(url=url, status=200, error=f"Invalid JSON from {url}: {e}",
+                           elapsed=time.perf_counter() - start, attempts=attempts)
+
+    return FetchResult(
+        url=url,
+        status=200,
+        data=data,
+        etag=response.headers.get("ETag", etag),
+        last_modified=response.headers.get("Last-Modified", last_modified),
+        elapsed=time.perf_counter() - start,
+        attempts=attempts,
+    )
+
+
+# Function to fetch several URLs concurrently; returns {url: FetchResult}
+def fetch_all(urls, validators=None, **kwargs):
+    """`validators` optionally maps url -> (etag, last_modified) for revalidation."""
+    validators = validators or {}
+    executor = _get_executor()
+    futures = {
+        url: executor.submit(fetch_url, url, *validators.get(url, (None, None)), **kwargs)
+        for url in dict.fromkeys(urls)
+    }
+    return {url: future.result() for url, future in futures.items()}
@@ -0,0 +1,303 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from helper_functions.http_fetch import fetch_url
+
+# """
+# This file contains the ingestion pipeline for data.gov.sg datastore resources.
+# Records are pulled page by page through datastore_search (offset/limit),
+# written straight to a typed Parquet file, and later loaded memory-mapped,
+# so the app never re-parses or holds the raw JSON pages. Each file records a
+# hash of its records, so re-ingesting unchanged data changes no version, and
+# a resource that failed to ingest is retried only after a backoff.
+# """
+
+DATASTORE_SEARCH_URL = "https://data.gov.sg/api/action/datastore_search"
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "datasets")
+PAGE_SIZE = 1000
+RETRY_SECONDS = 5 * 60  # How long a resource that failed to ingest is left alone
+NULL_VALUES = (None, "", "na", "NA", "-")
+
+# datastore field types -> Arrow types (data.gov.sg reports most columns as "text")
+INTEGER_TYPES = {"int", "int4", "int8", "integer", "bigint"}
+FLOAT_TYPES = {"numeric", "float", "float8", "double"}
+
+
+class IngestError(Exception):
+    """Raised when a datastore resource cannot be paged through."""
+
+
+class _WidenColumn(Exception):
+    """A later page has values that do not fit the type inferred from the first; ingestion restarts."""
+
+    def __init__(self, column, arrow_type):
+        super().__init__(column)
+        self.column = column
+        self.arrow_type = arrow_type
+
+
+# Function to get the resource_id(s) behind one of the api_urls entries
+def resource_ids_for(url, payload=None):
+    """Direct datastore_search URLs carry the id; collection metadata lists its child datasets."""
+    query = parse_qs(urlparse(url).query)
+    if "resource_id" in query:
+        return [query["resource_id"][0]]
+    if payload:
+        metadata = (payload.get("data") or {}).get("collectionMetadata") or {}
+        return list(metadata.get("childDatasets") or [])
+    return []
+
+
+def _page_url(resource_id, offset, limit):
+    return f"{DATASTORE_SEARCH_URL}?{urlencode({'resource_id': resource_id, 'offset': offset, 'limit': limit})}"
+
+
+# Generator yielding (fields, records) one datastore_search page at a time
+def iter_pages(resource_id, page_size=PAGE_SIZE, fetch=fetch_url, page_url=_page_url):
+    offset = 0
+    while True:
+        result = fetch(page_url(resource_id, offset, page_size))
+        if not result.ok:
+            raise IngestError(f"{resource_id} at offset {offset}: {result.error}")
+        body = (result.data or {}).get("result") or {}
+        records = body.get("records") or []
+        if records:
+            yield body.get("fields") or [], records
+        offset += len(records)
+        total = body.get("total")
+        if len(records) < page_size or (total is not None and offset >= total):
+            return
+
+
+def _is_declared_numeric(field):
+    declared = (field.get("type") or "text").lower()
+    return declared in INTEGER_TYPES or declared in FLOAT_TYPES
+
+
+def _infer_type(field, records, overrides=None):
+    name = field["id"]
+    declared = (field.get("type") or "text").lower()
+    if declared in INTEGER_TYPES:
+        return pa.int64()
+    if declared in FLOAT_TYPES:
+        return pa.float64()
+    if overrides and name in overrides:
+        return overrides[name]
+
+    # Text columns are promoted to numbers when every value on the first page parses
+    values = [record.get(name) for record in records]
+    values = [v for v in values if v not in NULL_VALUES]
+    if not values:
+        return pa.string()
+    try:
+        numbers = [float(v) for v in values]
+    except (TypeError, ValueError):
+        return pa.string()
+    if all(n.is_integer() for n in numbers) and not any("." in str(v) for v in values):
+        return pa.int64()
+    return pa.float64()
+
+
+# Function to get the wider type a promoted text column needs for these records, or None if they fit
+def _widened(name, arrow_type, records):
+    wider = None
+    for record in records:
+        value = record.get(name)
+        if value in NULL_VALUES:
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return pa.string()
+        if arrow_type == pa.int64() and (not number.is_integer() or "." in str(value)):
+            wider = pa.float64()
+    return wider
+
+
+def _coerce(value, arrow_type):
+    if value is None or value == "":
+        return None
+    if arrow_type == pa.string():
+        return str(value)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None  # e.g. "na" in a numeric column
+    if arrow_type == pa.int64():
+        return int(number) if number.is_integer() else None
+    return number
+
+
+def _schema(fields, records, overrides=None):
+    return pa.schema(
+        [pa.field(field["id"], _infer_type(field, records, overrides)) for field in fields if field["id"] != "_id"]
+    )
+
+
+def _record_batch(schema, records):
+    columns = [
+        pa.array([_coerce(record.get(field.name), field.type) for record in records], type=field.type)
+        for field in schema
+    ]
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+# Function to ingest every page of a resource into <data_dir>/<resource_id>.parquet
+def ingest_resource(resource_id, data_dir=DEFAULT_DATA_DIR, page_size=PAGE_SIZE, **page_kwargs):
+    """Returns the number of rows written. The file is replaced atomically.
+
+    Column types are inferred from the first page; if a later page does not fit (e.g. "na" or "1.5" in a
+    column of whole numbers), ingestion starts again with that column widened (to float, or to string).
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    overrides = {}
+    while True:
+        try:
+            return _write_resource(resource_id, data_dir, page_size, overrides, page_kwargs)
+        except _WidenColumn as e:
+            overrides[e.column] = e.arrow_type
+
+
+def _write_resource(resource_id, data_dir, page_size, overrides, page_kwargs):
+    path = os.path.join(data_dir, f"{resource_id}.parquet")
+    tmp_path = f"{path}.tmp"
+
+    writer = None
+    rows = 0
+    content_hash = hashlib.sha256()
+    try:
+        for fields, records in iter_pages(resource_id, page_size=page_size, **page_kwargs):
+            if writer is None:
+                schema = _schema(fields, records, overrides).with_metadata({
+                    "resource_id": resource_id,
+                    "ingested_at": str(time.time()),
+                })
+                declared_numeric = {field["id"] for field in fields if _is_declared_numeric(field)}
+                promoted = [field for field in schema
+                            if field.type != pa.string() and field.name not in declared_numeric]
+                writer = pq.ParquetWriter(tmp_path, schema, compression="zstd")
+            for field in promoted:
+                wider = _widened(field.name, field.type, records)
+                if wider is not None:
+                    raise _WidenColumn(field.name, wider)
+            writer.write_batch(_record_batch(schema, records))
+            content_hash.update(json.dumps(records, sort_keys=True, default=str).encode())
+            rows += len(records)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if writer is None:
+        raise IngestError(f"{resource_id} returned no records")
+    writer.add_key_value_metadata({"content_hash": content_hash.hexdigest()})
+    writer.close()
+    os.replace(tmp_path, path)
+    return rows
+
+
+class DatasetStore:
+    """Local Parquet copies of datastore resources, ingested in the background."""
+
+    def __init__(self, data_dir=DEFAULT_DATA_DIR, max_age_seconds=24 * 60 * 60, max_workers=4,
+                 retry_seconds=RETRY_SECONDS):
+        self.data_dir = data_dir
+        self.max_age_seconds = max_age_seconds
+        self.retry_seconds = retry_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._errors = {}  # resource_id -> (message, time of the failure)
+        self._tables = {}  # resource_id -> (mtime, memory-mapped pyarrow.Table)
+        self._hashes = {}  # resource_id -> (mtime, content hash)
+
+    def path(self, resource_id):
+        return os.path.join(self.data_dir, f"{resource_id}.parquet")
+
+    def is_fresh(self, resource_id, now=None):
+        try:
+            mtime = os.path.getmtime(self.path(resource_id))
+        except OSError:
+            return False
+        return (now if now is not None else time.time()) - mtime < self.max_age_seconds
+
+    # Identifies the local files' contents (their records' hashes; None if missing)
+    def version(self, resource_ids):
+        return tuple(self.content_hash(resource_id) for resource_id in resource_ids)
+
+    # Function to get the hash of a resource's records, read from its file once per modification
+    def content_hash(self, resource_id):
+        path = self.path(resource_id)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._hashes.get(resource_id)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        metadata = pq.read_metadata(path).metadata or {}
+        content_hash = metadata.get(b"content_hash", b"").decode() or mtime  # Files from before hashing
+        with self._lock:
+            self._hashes[resource_id] = (mtime, content_hash)
+        return content_hash
+
+    def last_error(self, resource_id):
+        with self._lock:
+            error = self._errors.get(resource_id)
+            return error[0] if error else None
+
+    # Never blocks: queues ingestion for any resource that is missing or too old (and has not just failed)
+    def ensure(self, resource_ids):
+        now = time.time()
+        for resource_id in resource_ids:
+            with self._lock:
+                if resource_id in self._pending or self.is_fresh(resource_id, now):
+                    continue
+                error = self._errors.get(resource_id)
+                if error is not None and now - error[1] < self.retry_seconds:
+                    continue
+                self._pending.add(resource_id)
+            self._executor.submit(self._ingest, resource_id)
+
+    def _ingest(self, resource_id):
+        try:
+            ingest_resource(resource_id, data_dir=self.data_dir)
+            with self._lock:
+                self._errors.pop(resource_id, None)
+        except Exception as e:
+            with self._lock:
+                self._errors[resource_id] = (str(e), time.time())
+        finally:
+            with self._lock:
+                self._pending.discard(resource_id)
+
+    # Memory-mapped Arrow table for a resource, or None if it has not been ingested yet
+    def load_table(self, resource_id):
+        path = self.path(resource_id)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._tables.get(resource_id)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        table = pq.read_table(path, memory_map=True)
+        with self._lock:
+            self._tables[resource_id] = (mtime, table)
+        return table
+
+    def load_frame(self, resource_id):
+        table = self.load_table(resource_id)
+        return table.to_pandas() if table is not None else None
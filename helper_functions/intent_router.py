@@ -0,0 +1,277 @@
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from helper_functions.retrieval import YEAR_PATTERN, column_kind
+
+# """
+# This file contains the local intent router that sits in front of the LLM.
+# Plain lookups ("full retirement sum for 2024", "monthly payout under RSS")
+# are recognised by regex rules backed by a small nearest-centroid classifier
+# (hashed word features, NumPy), their slots (years, age, gender) extracted,
+# and answered straight from the cached datasets with a templated response.
+# Everything open-ended still goes to the LLM. Hit rates are recorded so the
+# latency and cost saved can be measured.
+# """
+
+OPEN_INTENT = "open"
+FEATURE_DIMENSIONS = 2 ** 12
+MAX_TABLE_ROWS = 12
+MAX_AGE = 120  # Open-ended age groups ("70 & Over") must not take in ages nobody reaches
+
+
+@dataclass(frozen=True)
+class Intent:
+    name: str
+    dataset: str  # Name of the dataset in api_urls that answers it
+    pattern: re.Pattern
+    title: str
+    examples: tuple
+
+
+INTENTS = [
+    Intent(
+        "full_retirement_sum",
+        "Full Retirement Sum",
+        re.compile(r"\b(frs|full retirement sums?)\b", re.I),
+        "Full Retirement Sum",
+        ("full retirement sum for 2024", "what is the frs", "frs in 2023", "how much is the full retirement sum",
+         "full retirement sum", "what was the frs in 2020", "current full retirement sum amount"),
+    ),
+    Intent(
+        "rss_payout",
+        "Yearly amount of monthly payout under Retirement Sum Scheme",
+        re.compile(r"\b(rss|retirement sum scheme|monthly payouts?)\b", re.I),
+        "Monthly payouts under the Retirement Sum Scheme",
+        ("monthly payout under rss", "retirement sum scheme payout amount", "rss payouts in 2022",
+         "how much was paid out monthly under the retirement sum scheme", "yearly amount of monthly payouts"),
+    ),
+    Intent(
+        "member_balances",
+        "Number of CPF Members & Net Balances by Age Group & Gender as at End of Year",
+        re.compile(r"\b(number of (cpf |female |male )*members|how many (cpf )?members|members? count|net balances?|"
+                   r"balances by age)\b", re.I),
+        "CPF members and net balances",
+        ("number of cpf members in 2023", "net balances by age group", "how many cpf members are there",
+         "number of female members aged 55", "total net balance of members", "member count by gender"),
+    ),
+    Intent(
+        "withdrawals",
+        "Retirement withdrawals, Annual",
+        re.compile(r"\b(retirement )?withdrawals? (statistics|figures|amounts?|in|for|by)\b|\bannual withdrawals?\b", re.I),
+        "Annual retirement withdrawals",
+        ("retirement withdrawals in 2023", "annual withdrawals", "withdrawal amounts by year",
+         "how much was withdrawn in 2022", "total retirement withdrawals"),
+    ),
+]
+
+# Questions asking for advice, explanation, history, a comparison or something about the user go to the LLM
+OPEN_PATTERN = re.compile(
+    r"\b(should|advice|advise|recommend|plan|planning|why|explain|better|worth|eligible|eligibility|"
+    r"can i|do i|am i|will i|my|me|if|how do|how does|how can|how is|how are|how was|how were|when|"
+    r"start|started|begin|began|introduced|computed|calculated|determined|decided|set|"
+    r"compare|compared|comparison|difference|differ|versus|vs|than|lower|higher|more|less|"
+    r"increase|decrease|change|changed|options?|help)\b"
+    r"|^\s*(and|also|what about|how about|is|are|was|were|does|did)\b",
+    re.I,
+)
+OPEN_EXAMPLES = (
+    "should i top up my cpf", "how do i plan for retirement", "what are my retirement options",
+    "explain how cpf life works", "can i withdraw my savings early", "why is my payout lower",
+    "what happens if i work past 65", "how can i increase my monthly payout", "is it worth joining cpf life",
+    "what should i do with my retirement account",
+)
+
+AGE_PATTERN = re.compile(r"\b(?:age|aged)\s*(\d{1,3})\b|\b(\d{1,3})[- ]?(?:years?[- ]old|yo)\b", re.I)
+GENDER_PATTERN = re.compile(r"\b(male|female|men|women|man|woman)\b", re.I)
+
+
+def _tokens(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+# Function to map a text to an L2-normalised vector of hashed word and word-pair counts
+def featurize(texts):
+    matrix = np.zeros((len(texts), FEATURE_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        tokens = _tokens(text)
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            matrix[row, zlib.crc32(feature.encode()) % FEATURE_DIMENSIONS] += 1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-9)
+
+
+class IntentClassifier:
+    """Nearest-centroid classifier over hashed bag-of-words features."""
+
+    def __init__(self, examples):
+        # examples: {label: [texts]}
+        self.labels = list(examples)
+        centroids = np.stack([featurize(list(texts)).mean(axis=0) for texts in examples.values()])
+        self.centroids = centroids / np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-9)
+
+    # Function to get (label, cosine similarity) for each text
+    def predict(self, texts):
+        similarities = featurize(texts) @ self.centroids.T
+        best = similarities.argmax(axis=1)
+        return [(self.labels[index], float(similarities[row, index])) for row, index in enumerate(best)]
+
+
+@dataclass(frozen=True)
+class Slots:
+    years: tuple = ()
+    age: Optional[int] = None
+    gender: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    intent: str  # An intent name, or OPEN_INTENT
+    source: str  # "rule" or "fallback"
+    confidence: float
+    slots: Slots = field(default_factory=Slots)
+
+    @property
+    def is_lookup(self):
+        return self.intent != OPEN_INTENT
+
+
+# Function to extract the years, age and gender a lookup question asks about
+def extract_slots(question):
+    years = tuple(sorted({int(year) for year in YEAR_PATTERN.findall(question)}))
+    age_match = AGE_PATTERN.search(question)
+    age = int(next(group for group in age_match.groups() if group)) if age_match else None
+    gender_match = GENDER_PATTERN.search(question)
+    gender = None
+    if gender_match:
+        gender = "female" if gender_match.group(1).lower() in ("female", "women", "woman") else "male"
+    return Slots(years, age, gender)
+
+
+def _format_value(value, column=None):
+    if column is not None and column_kind(column):
+        return str(value)  # Years, age groups and genders are labels, not amounts
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return f"{value:,}"
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+def _label(column):
+    return str(column).replace("_", " ").strip().capitalize()
+
+
+# Function to render the templated answer for a lookup, or None if the data cannot answer it
+def render_lookup(intent, slots, dataset_index):
+    if dataset_index is None or not dataset_index.rows:
+        return None
+    year_postings = dataset_index.postings.get("year", {})
+    # Never silently answer for a different year than the one asked about
+    if slots.years and year_postings and not any(year in year_postings for year in slots.years):
+        return None
+    # Nor for everyone when the age or gender asked about is not in the data (select() skips such filters)
+    if slots.age is not None and (slots.age > MAX_AGE or not any(bounds and bounds[0] <= slots.age <= bounds[1]
+                                                             for _key, bounds in dataset_index.age_groups)):
+        return None
+    if slots.gender and not dataset_index.postings.get("gender", {}).get(slots.gender):
+        return None
+    row_ids = dataset_index.select(list(slots.years), slots.age, slots.gender, max_rows=MAX_TABLE_ROWS)
+    if not row_ids:
+        return None
+    rows = [dataset_index.rows[row_id] for row_id in row_ids]
+    columns = [column for column in rows[0] if column != "_id"]
+    value_columns = [column for column in columns if column_kind(column) is None]
+
+    year_column = dataset_index.columns.get("year")
+    if len(rows) == 1 and len(value_columns) == 1:
+        row = rows[0]
+        when = f" for {row[year_column]}" if year_column else ""
+        value = _format_value(row[value_columns[0]])
+        text = f"{intent.title}{when}: **{value}** ({_label(value_columns[0])})."
+    else:
+        lines = [f"**{intent.title}**", "", "| " + " | ".join(_label(column) for column in columns) + " |",
+                 "|" + " --- |" * len(columns)]
+        for row in rows:
+            lines.append("| " + " | ".join(_format_value(row.get(column), column) for column in columns) + " |")
+        text = "\n".join(lines)
+    return f"{text}\n\nSource: *{dataset_index.name}*, data.gov.sg."
+
+
+class IntentRouter:
+    """Routes each question to a local lookup or to the LLM, and keeps hit-rate stats."""
+
+    def __init__(self, intents=INTENTS):
+        self.intents = {intent.name: intent for intent in intents}
+        examples = {intent.name: intent.examples for intent in intents}
+        examples[OPEN_INTENT] = OPEN_EXAMPLES
+        self.classifier = IntentClassifier(examples)
+        self._lock = threading.Lock()
+        self.stats = {"questions": 0, "answered_locally": 0, "lookup_misses": 0, "local_seconds": 0.0,
+                      "by_intent": {}}
+
+    # Function to decide whether a question is a plain lookup (and which) or open-ended.
+    # A lookup needs its intent's keyword pattern to match and the classifier to agree.
+    def route(self, question):
+        slots = extract_slots(question)
+        if OPEN_PATTERN.search(question):
+            return RouteDecision(OPEN_INTENT, "rule", 1.0, slots)
+        label, similarity = self.classifier.predict([question])[0]
+        matched = [name for name, intent in self.intents.items() if intent.pattern.search(question)]
+        if len(matched) == 1:
+            # A keyword alone ("the FRS") does not make a lookup: the classifier must pick the same intent
+            if label == matched[0]:
+                return RouteDecision(matched[0], "rule", similarity, slots)
+            return RouteDecision(OPEN_INTENT, "rule", similarity, slots)
+        if len(matched) > 1:
+            return RouteDecision(OPEN_INTENT, "rule", 1.0, slots)  # Spans datasets: let the LLM combine them
+        # Without a keyword the classifier never picks a lookup alone: "the basic retirement sum" or "the
+        # retirement age" look like the FRS to it, and a confident wrong figure is worse than an LLM call
+        return RouteDecision(OPEN_INTENT, "fallback", similarity, slots)
+
+    # Function to answer a lookup from the retrieval index; returns (decision, answer or None)
+    def answer(self, question, retrieval_index):
+        start = time.perf_counter()
+        decision = self.route(question)
+        answer = None
+        if decision.is_lookup:
+            intent = self.intents[decision.intent]
+            dataset_index = next((index for index in retrieval_index.indexes if index.name == intent.dataset), None)
+            answer = render_lookup(intent, decision.slots, dataset_index)
+        with self._lock:
+            self.stats["questions"] += 1
+            if answer is not None:
+                self.stats["answered_locally"] += 1
+                self.stats["local_seconds"] += time.perf_counter() - start
+                by_intent = self.stats["by_intent"]
+                by_intent[decision.intent] = by_intent.get(decision.intent, 0) + 1
+            elif decision.is_lookup:
+                self.stats["lookup_misses"] += 1  # Recognised, but the data could not answer it
+        return decision, answer
+
+    # Hit rate and, given the LLM's typical latency and tokens per call, what the local answers saved
+    def summary(self, llm_latency=None, llm_tokens_per_call=None):
+        with self._lock:
+            stats = dict(self.stats, by_intent=dict(self.stats["by_intent"]))
+        hits = stats["answered_locally"]
+        summary = {
+            "questions": stats["questions"],
+            "answered_locally": hits,
+            "lookup_misses": stats["lookup_misses"],
+            "hit_rate": hits / stats["questions"] if stats["questions"] else 0.0,
+            "average_local_latency": stats["local_seconds"] / hits if hits else None,
+            "by_intent": stats["by_intent"],
+        }
+        if llm_latency is not None:
+            summary["estimated_seconds_saved"] = hits * llm_latency - stats["local_seconds"]
+        if llm_tokens_per_call is not None:
+            summary["estimated_tokens_saved"] = int(hits * llm_tokens_per_call)
+        return summary
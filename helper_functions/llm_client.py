@@ -0,0 +1,197 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from helper_functions.telemetry import telemetry
+
+# """
+# This file contains the managed OpenAI client used by the chatbot.
+# One client (and one httpx connection pool) is built per process and shared
+# by every session, and each call's latency and token usage is recorded.
+# """
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+CONNECT_TIMEOUT_SECONDS = 5.0
+REQUEST_TIMEOUT_SECONDS = 60.0
+MAX_RETRIES = 2
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY_SECONDS = 120.0
+
+
+@dataclass(frozen=True)
+class LLMCallStats:
+    """Timing and token usage of one completion call."""
+
+    model: str
+    started_at: float
+    latency: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    first_token_latency: Optional[float] = None
+    error: Optional[str] = None
+
+
+# Function to build an OpenAI client on a tuned, keep-alive httpx pool
+def build_openai_client(api_key, base_url=None, max_retries=MAX_RETRIES):
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(REQUEST_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS),
+    )
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url or None,
+        http_client=http_client,
+        max_retries=max_retries,
+        timeout=httpx.Timeout(REQUEST_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS),
+    )
+
+
+
+# Function to build an async OpenAI client (for concurrent calls on one event loop)
+def build_async_openai_client(api_key, base_url=None, max_retries=MAX_RETRIES):
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(REQUEST_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS),
+    )
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url or None,
+        http_client=http_client,
+        max_retries=max_retries,
+        timeout=httpx.Timeout(REQUEST_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS),
+    )
+
+class LLMClient:
+    """Thread-safe wrapper around one long-lived OpenAI client that records call stats."""
+
+    def __init__(self, client, model=DEFAULT_MODEL, history_size=1000):
+        self.client = client
+        self.model = model
+        self._calls = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+
+    # Function to run a chat completion and record its latency and token usage
+    def chat(self, messages, **kwargs):
+        model = kwargs.pop("model", self.model)
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            response = self.client.chat.completions.create(model=model, messages=messages, **kwargs)
+        except Exception as e:
+            self.record(LLMCallStats(model, started_at, time.perf_counter() - start, error=str(e)))
+            raise
+
+        usage = getattr(response, "usage", None)
+        self.record(LLMCallStats(
+            model,
+            started_at,
+            time.perf_counter() - start,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            total_tokens=getattr(usage, "total_tokens", 0) or 0,
+        ))
+        return response
+
+    # Generator yielding the completion text as it arrives (stats recorded when it ends)
+    def chat_stream(self, messages, **kwargs):
+        model = kwargs.pop("model", self.model)
+        started_at = time.time()
+        start = time.perf_counter()
+        first_token_latency = None
+        usage = None
+        error = None
+        stream = None
+        try:
+            stream = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True},
+                **kwargs,
+            )
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    if first_token_latency is None:
+                        first_token_latency = time.perf_counter() - start
+                    yield text
+        except GeneratorExit:
+            error = "cancelled"  # The consumer stopped reading, e.g. a Streamlit rerun
+            raise
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            if stream is not None:
+                stream.close()  # Release the pooled connection straight away
+            self.record(LLMCallStats(
+                model,
+                started_at,
+                time.perf_counter() - start,
+                prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+                total_tokens=getattr(usage, "total_tokens", 0) or 0,
+                first_token_latency=first_token_latency,
+                error=error,
+            ))
+
+    def record(self, stats):
+        with self._lock:
+            self._calls.append(stats)
+        if telemetry.enabled:
+            attributes = {"model": stats.model}
+            if stats.error is not None:
+                attributes["error"] = stats.error
+            telemetry.observe("llm.call", stats.latency, **attributes)
+            if stats.first_token_latency is not None:
+                telemetry.observe("llm.first_token", stats.first_token_latency, model=stats.model)
+            telemetry.increment("llm_calls", model=stats.model, outcome="error" if stats.error else "ok")
+            telemetry.increment("llm_tokens", stats.prompt_tokens, model=stats.model, kind="prompt")
+            telemetry.increment("llm_tokens", stats.completion_tokens, model=stats.model, kind="completion")
+
+    def recent_calls(self):
+        with self._lock:
+            return list(self._calls)
+
+    # Summary of the recorded calls: count, errors, latency percentiles and tokens
+    def summary(self):
+        calls = self.recent_calls()
+        latencies = sorted(call.latency for call in calls if call.error is None)
+        first_token_latencies = sorted(
+            call.first_token_latency for call in calls if call.first_token_latency is not None
+        )
+
+        def percentile(values, p):
+            if not values:
+                return None
+            return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+        return {
+            "calls": len(calls),
+            "errors": sum(1 for call in calls if call.error is not None),
+            "p50_latency": percentile(latencies, 50),
+            "p95_latency": percentile(latencies, 95),
+            "p50_first_token_latency": percentile(first_token_latencies, 50),
+            "prompt_tokens": sum(call.prompt_tokens for call in calls),
+            "completion_tokens": sum(call.completion_tokens for call in calls),
+            "total_tokens": sum(call.total_tokens for call in calls),
+        }
@@ -0,0 +1,242 @@
+import asyncio
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from helper_functions.llm_client import DEFAULT_MODEL, LLMCallStats
+
+# """
+# This file contains the prompt chaining engine for compound questions.
+# A question such as "What is the FRS and how much can I withdraw at 55?" is
+# split into sub-questions, which are answered concurrently with the async
+# OpenAI client (capped by a semaphore, each with its own timeout), and the
+# sub-answers are merged in a final synthesis step. End-to-end latency is
+# then the slowest sub-call plus the synthesis, not the sum of the calls.
+# A part that refers back to an earlier one ("...and is it higher than in
+# 2023?") is kept in the same sub-question, so every step stands on its own,
+# and each step is sent with the conversation so far.
+# """
+
+MAX_STEPS = 4
+MAX_CONCURRENCY = 4  # Chained calls in flight at once, across all sessions
+STEP_TIMEOUT_SECONDS = 20.0
+SYNTHESIS_TIMEOUT_SECONDS = 40.0
+MIN_QUESTION_WORDS = 3
+
+QUESTION_WORDS = (
+    "what", "how", "when", "where", "which", "who", "whom", "whose", "why", "can", "could", "is", "are",
+    "am", "do", "does", "did", "should", "will", "would", "may", "tell", "explain", "list", "compare", "describe",
+)
+LIST_MARKER = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s+", re.M)
+SENTENCE_SPLIT = re.compile(r"(?<=[?.!])\s+|\s*;\s*|\n+")
+CONJUNCTION_SPLIT = re.compile(
+    r",?\s+(?:and|also|plus)\s+(?:also\s+)?(?=(?:" + "|".join(QUESTION_WORDS) + r")\b)", re.I
+)
+# Words that make a part depend on an earlier one: it cannot be answered without that part's answer
+DEPENDENT_PART = re.compile(
+    r"\b(?:it|its|that|this|they|them|their|those|these|same|then|compared|higher|lower|more|less|"
+    r"bigger|smaller|difference|change[sd]?)\b",
+    re.I,
+)
+
+STEP_INSTRUCTION = "Answer only this part of the user's question, briefly and with figures where relevant."
+
+
+def _is_question(part):
+    words = part.split()
+    return part.endswith("?") or (bool(words) and words[0].lower().strip(",") in QUESTION_WORDS)
+
+
+# Function to add a part to the sub-question it refers back to
+def _join_parts(first, second):
+    return f"{first} {second}" if first.endswith(("?", ".", "!")) else f"{first} and {second}"
+
+
+# Function to split a compound question into self-contained sub-questions ([question] if it is simple)
+def decompose(question, max_steps=MAX_STEPS):
+    parts = []
+    for sentence in SENTENCE_SPLIT.split(LIST_MARKER.sub("", question.strip())):
+        parts.extend(part.strip() for part in CONJUNCTION_SPLIT.split(sentence) if part and part.strip())
+
+    # Statements ("I am 54 and self-employed.") are context for every sub-question, not questions
+    context = " ".join(part for part in parts if not _is_question(part))
+    questions, seen = [], set()
+    for part in parts:
+        key = part.lower().rstrip("?. ")
+        if not _is_question(part):
+            continue
+        if questions and DEPENDENT_PART.search(part):
+            questions[-1] = _join_parts(questions[-1], part)  # Answered together, with what it refers to
+        elif len(part.split()) >= MIN_QUESTION_WORDS and key not in seen:
+            seen.add(key)
+            questions.append(part)
+    if len(questions) < 2:
+        return [question]
+    if len(questions) > max_steps:
+        questions = questions[:max_steps - 1] + [" ".join(questions[max_steps - 1:])]
+    return [f"{context} {sub_question}" if context else sub_question for sub_question in questions]
+
+
+@dataclass(frozen=True)
+class StepResult:
+    """The answer to one sub-question (or why there is none)."""
+
+    question: str
+    answer: Optional[str]
+    latency: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+@dataclass(frozen=True)
+class ChainResult:
+    answer: str
+    steps: tuple
+    latency: float
+
+
+# Function to format the sub-answers for the synthesis prompt
+def format_sub_answers(steps):
+    lines = ["<Sub-Answers>"]
+    for number, step in enumerate(steps, 1):
+        lines.append(f"{number}. Q: {step.question}")
+        lines.append(f"   A: {step.answer}" if step.ok else f"   A: (not available: {step.error})")
+    lines.append("</Sub-Answers>")
+    return "\n".join(lines)
+
+
+class PromptChain:
+    """Concurrent, time-limited chained completions on a private event loop.
+
+    From synchronous code (e.g. a Streamlit script) use `run(chain.answer(...))`;
+    the coroutines can also be awaited directly, from a single event loop.
+    """
+
+    def __init__(self, client_factory, model=DEFAULT_MODEL, max_concurrency=MAX_CONCURRENCY,
+                 step_timeout_seconds=STEP_TIMEOUT_SECONDS, synthesis_timeout_seconds=SYNTHESIS_TIMEOUT_SECONDS,
+                 record=None):
+        self.client_factory = client_factory
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.step_timeout_seconds = step_timeout_seconds
+        self.synthesis_timeout_seconds = synthesis_timeout_seconds
+        self.record = record
+        # The async client and the semaphore belong to the loop they are first used on
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="prompt-chain", daemon=True).start()
+            return self._loop
+
+    # Run a coroutine on the chain's event loop and wait for its result
+    def run(self, coroutine, timeout=None):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def close(self):
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+    def _record(self, stats):
+        if self.record is not None:
+            self.record(stats)
+
+    async def complete(self, messages, timeout):
+        if self._client is None:
+            self._client = self.client_factory()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            started_at = time.time()
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    self._client.chat.completions.create(model=self.model, messages=messages, timeout=timeout),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                self._record(LLMCallStats(self.model, started_at, time.perf_counter() - start, error="timed out"))
+                raise
+            except asyncio.CancelledError:
+                self._record(LLMCallStats(self.model, started_at, time.perf_counter() - start, error="cancelled"))
+                raise
+            except Exception as e:
+                self._record(LLMCallStats(self.model, started_at, time.perf_counter() - start, error=str(e)))
+                raise
+            usage = getattr(response, "usage", None)
+            self._record(LLMCallStats(
+                self.model,
+                started_at,
+                time.perf_counter() - start,
+                prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+                total_tokens=getattr(usage, "total_tokens", 0) or 0,
+            ))
+            return response.choices[0].message.content or ""
+
+    async def _step(self, question, messages):
+        start = time.perf_counter()
+        try:
+            answer = await self.complete(messages, self.step_timeout_seconds)
+        except asyncio.TimeoutError:
+            return StepResult(question, None, time.perf_counter() - start, error="timed out")
+        except Exception as e:
+            return StepResult(question, None, time.perf_counter() - start, error=str(e) or type(e).__name__)
+        return StepResult(question, answer, time.perf_counter() - start)
+
+    # Answer independent sub-questions concurrently; a failed or slow step never fails the others
+    async def run_steps(self, steps):
+        """`steps` is [(question, messages)]; returns a StepResult per step, in order."""
+        return list(await asyncio.gather(*(self._step(question, messages) for question, messages in steps)))
+
+    # Merge the sub-answers into one answer to the original question
+    async def synthesize(self, system_prompt, question, step_results, context="", history=()):
+        content = "\n".join(filter(None, [context, question, format_sub_answers(step_results)]))
+        messages = [
+            {"role": "system", "content": system_prompt + " Combine the <Sub-Answers> into one answer to the question."},
+            *history,
+            {"role": "user", "content": content},
+        ]
+        return await self.complete(messages, self.synthesis_timeout_seconds)
+
+    # Answer a question end to end: decompose, answer the parts concurrently, then synthesize.
+    # `history` is the conversation so far ([{"role", "content"}]), sent with every call.
+    async def answer(self, question, system_prompt, context="", history=()):
+        start = time.perf_counter()
+        sub_questions = decompose(question)
+        if len(sub_questions) == 1:
+            messages = [
+                {"role": "system", "content": system_prompt},
+                *history,
+                {"role": "user", "content": "\n".join(filter(None, [context, question]))},
+            ]
+            answer = await self.complete(messages, self.synthesis_timeout_seconds)
+            return ChainResult(answer, (), time.perf_counter() - start)
+
+        steps = await self.run_steps([
+            (sub_question, [
+                {"role": "system", "content": f"{system_prompt} {STEP_INSTRUCTION}"},
+                *history,
+                {"role": "user", "content": "\n".join(filter(None, [context, sub_question]))},
+            ])
+            for sub_question in sub_questions
+        ])
+        answer = await self.synthesize(system_prompt, question, steps, context, history)
+        return ChainResult(answer, tuple(steps), time.perf_counter() - start)
@@ -0,0 +1,252 @@
+import streamlit as st
+
+# """
+# This file contains the app's shared, process-wide resources and settings:
+# the dataset registry, the cached clients and stores, and the functions that
+# load the datasets. Each resource imports its (heavy) dependencies only when
+# it is first built, so pages that do not use it never pay for the import.
+# """
+
+# Hardcoded API URLs
+api_urls = {
+    "Number of CPF Members & Net Balances by Age Group & Gender as at End of Year": "https://api-production.data.gov.sg/v2/public/api/collections/46/metadata",
+    "Retirement withdrawals, Annual": "https://api-production.data.gov.sg/v2/public/api/collections/43/metadata",
+     "Full Retirement Sum": "https://data.gov.sg/api/action/datastore_search?resource_id=d_b212dff55c98a4c0b3d3d850bf744ad7",
+     "Yearly amount of monthly payout under Retirement Sum Scheme": "https://data.gov.sg/api/action/datastore_search?resource_id=d_c055f39619d2e8a8e0ddf87823b1066d"
+}
+
+# How long a cached answer may be reused (all cached answers are dropped when a dataset changes)
+RESPONSE_CACHE_TTL_SECONDS = int(st.secrets.get("RESPONSE_CACHE_TTL_SECONDS", 6 * 60 * 60))
+
+# Token budget for the conversation history sent with each question
+HISTORY_TOKEN_BUDGET = int(st.secrets.get("HISTORY_TOKEN_BUDGET", 1500))
+
+# Turns (question and answer) shown in full; older messages are paged in on request
+HISTORY_WINDOW_TURNS = int(st.secrets.get("HISTORY_WINDOW_TURNS", 10))
+HISTORY_PAGE_SIZE = int(st.secrets.get("HISTORY_PAGE_SIZE", 20))
+
+# Chat session state kept on the server: sessions idle this long are evicted, at most this many
+# messages per session and sessions are kept in memory, and with a spill path the evicted ones
+# are written to a local SQLite file (restored if the same session asks again, deleted once
+# not asked for in SESSION_SPILL_TTL_SECONDS) instead of dropped
+SESSION_IDLE_SECONDS = int(st.secrets.get("SESSION_IDLE_SECONDS", 30 * 60))
+SESSION_MAX_MESSAGES = int(st.secrets.get("SESSION_MAX_MESSAGES", 200))
+SESSION_MAX_SESSIONS = int(st.secrets.get("SESSION_MAX_SESSIONS", 1000))
+SESSION_SPILL_PATH = st.secrets.get("SESSION_SPILL_PATH", "")
+SESSION_SPILL_TTL_SECONDS = int(st.secrets.get("SESSION_SPILL_TTL_SECONDS", 24 * 60 * 60))
+
+# Render assistant answers token by token as they stream in
+STREAM_RESPONSES = bool(st.secrets.get("STREAM_RESPONSES", True))
+
+# Answer the parts of compound questions concurrently before the final answer
+PROMPT_CHAINING = bool(st.secrets.get("PROMPT_CHAINING", True))
+
+# Answer plain data lookups (e.g. "full retirement sum for 2024") from the datasets, without the LLM
+LOCAL_LOOKUPS = bool(st.secrets.get("LOCAL_LOOKUPS", True))
+
+# How long a cached dataset is served before it is revalidated with data.gov.sg
+DATASET_TTL_SECONDS = int(st.secrets.get("DATASET_TTL_SECONDS", 60 * 60))
+
+# Admission control for OpenAI calls, shared by all sessions: requests per second (with bursts),
+# calls in flight, callers waiting in line (and for how long), and calls per session per minute
+LLM_RATE_PER_SECOND = float(st.secrets.get("LLM_RATE_PER_SECOND", 5))
+LLM_BURST = int(st.secrets.get("LLM_BURST", 10))
+LLM_MAX_CONCURRENT = int(st.secrets.get("LLM_MAX_CONCURRENT", 8))
+LLM_QUEUE_SIZE = int(st.secrets.get("LLM_QUEUE_SIZE", 32))
+LLM_QUEUE_TIMEOUT_SECONDS = float(st.secrets.get("LLM_QUEUE_TIMEOUT_SECONDS", 30))
+SESSION_CALLS_PER_MINUTE = int(st.secrets.get("SESSION_CALLS_PER_MINUTE", 20))
+
+# Tracing and metrics: spans and counters in memory (shown on the Admin page); optionally
+# spans written to a rotating JSONL file, and Prometheus text served at http://127.0.0.1:<port>/metrics
+TELEMETRY_ENABLED = bool(st.secrets.get("TELEMETRY_ENABLED", True))
+TELEMETRY_JSONL_PATH = st.secrets.get("TELEMETRY_JSONL_PATH", "")
+METRICS_PORT = int(st.secrets.get("METRICS_PORT", 0))
+
+# Telemetry is configured once per process; helpers record into the shared instance
+@st.cache_resource
+def get_telemetry():
+    from helper_functions.telemetry import configure
+
+    return configure(enabled=TELEMETRY_ENABLED, jsonl_path=TELEMETRY_JSONL_PATH or None,
+                     metrics_port=METRICS_PORT or None)
+
+# One OpenAI client (and connection pool) per process, shared by all sessions
+@st.cache_resource
+def get_llm_client():
+    from helper_functions.llm_client import LLMClient, build_openai_client
+
+    # Retrieve the API key from Streamlit's secrets
+    openai_api_key = st.secrets["OPENAI_API_KEY"]
+    # OPENAI_BASE_URL is optional, e.g. to point at a local OpenAI-compatible server.
+    # Calls go through the admission controller, which does the retrying (see get_admission_controller)
+    return LLMClient(build_openai_client(openai_api_key, base_url=st.secrets.get("OPENAI_BASE_URL"),
+                                         max_retries=0))
+
+# One admission controller per process, in front of every OpenAI call from every session
+@st.cache_resource
+def get_admission_controller():
+    from helper_functions.admission import AdmissionController
+
+    return AdmissionController(
+        rate_per_second=LLM_RATE_PER_SECOND,
+        burst=LLM_BURST,
+        max_concurrent=LLM_MAX_CONCURRENT,
+        max_queue=LLM_QUEUE_SIZE,
+        queue_timeout_seconds=LLM_QUEUE_TIMEOUT_SECONDS,
+        session_calls=SESSION_CALLS_PER_MINUTE,
+        session_window_seconds=60,
+    )
+
+# Identical questions asked at the same time (e.g. after a CPF announcement) share one OpenAI call
+@st.cache_resource
+def get_llm_single_flight():
+    from helper_functions.admission import is_session_rejection
+    from helper_functions.single_flight import SingleFlight
+
+    # One session being over its quota must not turn away everyone asking the same question
+    return SingleFlight("llm", private_error=is_session_rejection)
+
+# One prompt chain per process: its own event loop, async OpenAI client and concurrency cap
+@st.cache_resource
+def get_prompt_chain():
+    from helper_functions.llm_client import build_async_openai_client
+    from helper_functions.prompt_chain import PromptChain
+
+    openai_api_key = st.secrets["OPENAI_API_KEY"]
+    base_url = st.secrets.get("OPENAI_BASE_URL")
+    return PromptChain(
+        # Admitted as one batch by the admission controller; a failed chain falls back to a single call
+        lambda: build_async_openai_client(openai_api_key, base_url=base_url, max_retries=0),
+        # Chained calls show up in the same call stats as every other completion
+        record=get_llm_client().record,
+    )
+
+# One dataset cache per process, shared by every session and kept warm in the background
+@st.cache_resource
+def get_dataset_cache():
+    from helper_functions.data_cache import DatasetCache
+
+    cache = DatasetCache(ttl_seconds=DATASET_TTL_SECONDS)
+    cache.start(api_urls.values())
+    return cache
+
+# Answers to repeated (or near-identical) questions, shared by all sessions
+@st.cache_resource
+def get_response_cache():
+    from helper_functions.response_cache import ResponseCache
+
+    return ResponseCache(ttl_seconds=RESPONSE_CACHE_TTL_SECONDS)
+
+# Complete datasets, paged in from datastore_search and kept as local Parquet files
+@st.cache_resource
+def get_dataset_store():
+    from helper_functions.ingest import DatasetStore
+
+    return DatasetStore(max_age_seconds=DATASET_TTL_SECONDS)
+
+# Function to map each dataset name to its datastore resource_id(s)
+def dataset_resource_ids(dataset_cache):
+    from helper_functions.ingest import resource_ids_for
+
+    # Collections only list their child datasets once their metadata is cached
+    return {name: resource_ids_for(url, dataset_cache.get_data(url)) for name, url in api_urls.items()}
+
+# Function to load each dataset as a DataFrame: the full local copy if ingested, else the cached first page
+def load_dataset_frames():
+    import pandas as pd
+
+    dataset_cache = get_dataset_cache()
+    dataset_store = get_dataset_store()
+    frames = {}
+    for name, resource_ids in dataset_resource_ids(dataset_cache).items():
+        payload = dataset_cache.get_data(api_urls[name])
+        parts = [dataset_store.load_frame(resource_id) for resource_id in resource_ids]
+        parts = [part for part in parts if part is not None]
+        if parts:
+            frames[name] = pd.concat(parts, ignore_index=True)
+        elif payload and isinstance(payload.get("result"), dict):
+            frames[name] = pd.DataFrame(payload["result"].get("records") or [])
+    return frames
+
+# Combined version of the cached datasets and their local copies
+def current_data_version(dataset_cache, dataset_store):
+    resource_ids = [rid for ids in dataset_resource_ids(dataset_cache).values() for rid in ids]
+    return dataset_cache.version(api_urls.values()), dataset_store.version(resource_ids)
+
+# Retrieval index over the dataset rows, rebuilt only when the data version changes
+@st.cache_resource(max_entries=1)
+def get_retrieval_index(data_version):
+    from helper_functions.retrieval import RetrievalIndex
+
+    return RetrievalIndex.from_frames(load_dataset_frames())
+
+# Intent router for plain data lookups; one per process, so its hit rate covers every session
+@st.cache_resource
+def get_intent_router():
+    from helper_functions.intent_router import IntentRouter
+
+    return IntentRouter()
+
+# Aggregates for the Dashboard page, computed once per data version
+@st.cache_data(max_entries=4, show_spinner=False)
+def get_dashboard_aggregates(data_version):
+    from helper_functions.dashboard import compute_aggregates
+
+    return compute_aggregates(load_dataset_frames())
+
+# Function to queue ingestion of any dataset whose local copy is missing or too old (never blocks)
+def sync_dataset_store(dataset_cache, dataset_store):
+    for resource_ids in dataset_resource_ids(dataset_cache).values():
+        dataset_store.ensure(resource_ids)
+
+# Every session's chat state, kept compact on the server and evicted when idle
+@st.cache_resource
+def get_session_store():
+    from helper_functions.context_manager import ConversationContext
+    from helper_functions.session_store import SessionStore
+
+    return SessionStore(
+        idle_seconds=SESSION_IDLE_SECONDS,
+        max_messages=SESSION_MAX_MESSAGES,
+        max_sessions=SESSION_MAX_SESSIONS,
+        spill_path=SESSION_SPILL_PATH or None,
+        spill_ttl_seconds=SESSION_SPILL_TTL_SECONDS,
+        conversation_factory=lambda: ConversationContext(max_tokens=HISTORY_TOKEN_BUDGET),
+    )
+
+# One feedback store per process; submissions are written to SQLite in the background
+@st.cache_resource
+def get_feedback_store():
+    from helper_functions.feedback_store import FeedbackStore
+
+    return FeedbackStore()
+
+# Bundled images (see helper_functions/static_assets.py), read from disk once per process
+@st.cache_resource(show_spinner=False)
+def load_static_image(name):
+    from helper_functions.static_assets import read_image
+
+    data = read_image(name)
+    if data is None:
+        raise FileNotFoundError(name)  # Not cached, so images built later are picked up
+    return data
+
+# Function to get a bundled image, or None if it has not been built yet
+def get_static_image(name):
+    try:
+        return load_static_image(name)
+    except FileNotFoundError:
+        return None
+
+# A static page's blocks, merged once per process (the blocks are constants, so only the name is hashed)
+@st.cache_resource(show_spinner=False)
+def get_static_page(name, _blocks):
+    from helper_functions.static_assets import merge_blocks
+
+    return merge_blocks(_blocks)
+
+# Function to fetch data from a given API URL (pooled session, timeout and retries)
+def fetch_api_data(url):
+    from helper_functions.http_fetch import fetch_url
+
+    return fetch_url(url)
@@ -0,0 +1,190 @@
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from helper_functions.intent_router import GENDER_PATTERN, extract_slots
+from helper_functions.text import normalize_text
+
+# """
+# This file contains the response cache that sits in front of the LLM call.
+# Tier 1 is an exact match on the normalised structured prompt; tier 2 matches
+# near-duplicate questions (character trigram cosine similarity) asked with the
+# same user details and about exactly the same values: years, ages, genders,
+# any other numbers and negations must match, so "FRS in 2024" never gets the
+# answer cached for "FRS in 2025", nor "can I not withdraw" the one for "can I
+# withdraw". The two questions' words may also differ only by stop-words, so
+# "retirement sum scheme" never gets the answer for "retirement sum scheme
+# payout". Entries expire by TTL, are evicted LRU, and are all dropped
+# when the underlying data.gov.sg datasets change.
+# """
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_SIMILARITY_THRESHOLD = 0.9
+
+QUERY_PATTERN = re.compile(r"<User Query>\n(.*)\n<End of User Input>", re.DOTALL)
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+NEGATORS = frozenset({"not", "no", "never", "cannot", "without", "nor", "none"})
+# Words that do not change what a question asks; near matches may differ only by these
+STOP_WORDS = frozenset({
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "am", "what", "what's", "whats", "how", "much",
+    "many", "do", "does", "did", "i", "i'm", "me", "my", "mine", "we", "our", "you", "your", "it", "its", "this",
+    "that", "these", "those", "there", "of", "for", "to", "in", "on", "at", "about", "and", "or", "can", "could",
+    "would", "will", "please", "tell", "know", "explain", "kindly", "currently", "now", "today", "so", "just",
+})
+
+
+# Function to split a structured prompt into (user details, question)
+def split_prompt(prompt):
+    match = QUERY_PATTERN.search(prompt)
+    if not match:
+        return "", normalize_text(prompt)
+    context = prompt[:match.start()] + prompt[match.end():]
+    return normalize_text(context), normalize_text(match.group(1))
+
+
+def _is_negator(word):
+    return word in NEGATORS or word.endswith("n't")
+
+
+# Function to extract the values a question is about; near matches must agree on all of them
+def question_slots(question):
+    numbers = tuple(sorted(set(NUMBER_PATTERN.findall(question.replace(",", "")))))
+    genders = tuple(sorted({word.lower() for word in GENDER_PATTERN.findall(question)}))
+    negations = sum(1 for word in WORD_PATTERN.findall(question.lower()) if _is_negator(word))
+    return extract_slots(question), numbers, genders, negations
+
+
+# Function to get a question's content words (no stop-words, plurals folded); near matches must share them all
+def content_words(question):
+    words = set()
+    for word in WORD_PATTERN.findall(question.lower()):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    return frozenset(words)
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _cosine(a, a_norm, b, b_norm):
+    if not a_norm or not b_norm:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(count * b.get(gram, 0) for gram, count in a.items()) / (a_norm * b_norm)
+
+
+class _Entry:
+    __slots__ = ("answer", "created_at", "group", "grams", "norm", "words")
+
+    def __init__(self, answer, group, grams, words):
+        self.answer = answer
+        self.created_at = time.time()
+        self.group = group
+        self.grams = grams
+        self.words = words
+        self.norm = math.sqrt(sum(count * count for count in grams.values()))
+
+
+class ResponseCache:
+    """Thread-safe two-tier (exact, then near-duplicate) cache of LLM answers."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 similarity_threshold=DEFAULT_SIMILARITY_THRESHOLD):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()  # (context, question) -> _Entry, least recently used first
+        self._groups = {}  # (context, slots) -> set of keys: near matches only scan the same details and values
+        self._data_version = None
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "near_hits": 0, "misses": 0, "invalidations": 0}
+
+    # Drop every entry when the datasets behind the answers have changed
+    def set_data_version(self, version):
+        with self._lock:
+            if version == self._data_version:
+                return
+            if self._data_version is not None:
+                self._entries.clear()
+                self._groups.clear()
+                self.stats["invalidations"] += 1
+            self._data_version = version
+
+    # Returns (answer, "exact" | "near") or None
+    def get(self, prompt):
+        key = split_prompt(prompt)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry, now):
+                self._entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return entry.answer, "exact"
+
+            context, question = key
+            grams = _trigrams(question)
+            norm = math.sqrt(sum(count * count for count in grams.values()))
+            words = content_words(question)
+            best_key, best_score = None, self.similarity_threshold
+            for candidate_key in self._groups.get((context, question_slots(question)), ()):
+                candidate = self._entries[candidate_key]
+                if candidate.words != words or self._expired(candidate, now):
+                    continue  # Similar spelling is not enough: an extra or missing content word changes the question
+                score = _cosine(grams, norm, candidate.grams, candidate.norm)
+                if score >= best_score:
+                    best_key, best_score = candidate_key, score
+
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+                self.stats["near_hits"] += 1
+                return self._entries[best_key].answer, "near"
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, prompt, answer):
+        key = split_prompt(prompt)
+        context, question = key
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            group = (context, question_slots(question))
+            self._entries[key] = _Entry(answer, group, _trigrams(question), content_words(question))
+            self._groups.setdefault(group, set()).add(key)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _expired(self, entry, now):
+        return now - entry.created_at >= self.ttl_seconds
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        keys = self._groups.get(entry.group)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._groups[entry.group]
+
+    def _evict(self):
+        now = time.time()
+        for key in [key for key, entry in self._entries.items() if self._expired(entry, now)]:
+            self._remove(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
@@ -0,0 +1,174 @@
+import re
+
+# """
+# This file contains the retrieval stage that grounds answers in the datasets.
+# Rows are indexed by year, age group and gender (inverted index from value to
+# row ids); for each question only the few rows matching the question and the
+# user's details are put in the prompt, inside <Reference Data> tags.
+# """
+
+DEFAULT_MAX_ROWS = 8
+MAX_DATASETS = 2
+
+YEAR_PATTERN = re.compile(r"\b(19[5-9]\d|20\d\d)\b")
+NUMBER_PATTERN = re.compile(r"\d+")
+
+# Words in a question that point at each dataset (matched against the api_urls names too)
+DATASET_KEYWORDS = {
+    "member": 2, "members": 2, "balance": 2, "balances": 2, "savings": 1,
+    "withdrawal": 2, "withdrawals": 2, "withdraw": 2,
+    "full": 1, "retirement": 1, "sum": 2, "frs": 3,
+    "payout": 3, "payouts": 3, "monthly": 1, "rss": 3, "scheme": 1,
+}
+
+
+def _words(text):
+    return set(re.findall(r"[a-z]+", text.lower()))
+
+
+# Function to tell whether a column holds the year, age group or gender (else None)
+def column_kind(column):
+    # Whole words only, so e.g. "average_balance" is not taken for an age column
+    words = set(re.split(r"[^a-z]+", str(column).lower()))
+    if "year" in words:
+        return "year"
+    if "age" in words:
+        return "age"
+    if words & {"gender", "sex"}:
+        return "gender"
+    return None
+
+
+def _normalize_gender(value):
+    value = str(value).strip().lower()
+    if value in ("m", "male", "males", "men"):
+        return "male"
+    if value in ("f", "female", "females", "women"):
+        return "female"
+    return value
+
+
+# Function to get the (low, high) ages an age-group label covers, e.g. "55-59", "65 & Over", "Below 21"
+def age_bounds(label):
+    text = str(label).lower()
+    numbers = [int(n) for n in NUMBER_PATTERN.findall(text)]
+    if not numbers:
+        return None
+    if len(numbers) >= 2:
+        return numbers[0], numbers[1]
+    if any(word in text for word in ("below", "under", "less")):
+        return 0, numbers[0] - 1
+    if any(word in text for word in ("over", "above", "more", "+")):
+        return numbers[0], 200
+    return numbers[0], numbers[0]
+
+
+class DatasetIndex:
+    """Rows of one dataset with inverted indexes on its year, age and gender columns."""
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = rows
+        self.name_words = _words(name)
+        self.columns = {}  # kind -> column name
+        self.postings = {}  # kind -> {normalised value: set of row ids}
+        if rows:
+            for column in rows[0]:
+                kind = column_kind(column)
+                if kind and kind not in self.columns:
+                    self.columns[kind] = column
+        for kind, column in self.columns.items():
+            postings = self.postings.setdefault(kind, {})
+            for row_id, row in enumerate(rows):
+                value = row.get(column)
+                if value is None:
+                    continue
+                postings.setdefault(self._key(kind, value), set()).add(row_id)
+        self.years = sorted(self.postings.get("year", {}), key=str)
+        self.age_groups = [(key, age_bounds(key)) for key in self.postings.get("age", {})]
+
+    @staticmethod
+    def _key(kind, value):
+        if kind == "year":
+            match = YEAR_PATTERN.search(str(value))
+            return int(match.group(1)) if match else str(value)
+        if kind == "gender":
+            return _normalize_gender(value)
+        return str(value).strip().lower()
+
+    # How strongly a question points at this dataset
+    def relevance(self, question_words):
+        return sum(DATASET_KEYWORDS.get(word, 0) for word in question_words & self.name_words)
+
+    # Row ids matching the years, age and gender; a filter is skipped if it would match nothing
+    def select(self, years=None, age=None, gender=None, max_rows=DEFAULT_MAX_ROWS):
+        candidates = set(range(len(self.rows)))
+
+        year_postings = self.postings.get("year")
+        if year_postings:
+            wanted = [year for year in (years or []) if year in year_postings]
+            if not wanted:
+                numeric = [year for year in self.years if isinstance(year, int)]
+                wanted = numeric[-1:] if numeric else []  # Default to the latest year
+            if wanted:
+                candidates &= set().union(*(year_postings[year] for year in wanted))
+
+        if age is not None and self.age_groups:
+            groups = [key for key, bounds in self.age_groups if bounds and bounds[0] <= age <= bounds[1]]
+            if groups:
+                candidates &= set().union(*(self.postings["age"][key] for key in groups))
+
+        if gender and "gender" in self.postings:
+            matching = self.postings["gender"].get(_normalize_gender(gender))
+            if matching:
+                candidates &= matching
+
+        return sorted(candidates)[:max_rows]
+
+
+class RetrievalIndex:
+    """Indexes over all datasets; picks the relevant rows for a question."""
+
+    def __init__(self, datasets):
+        # datasets: {dataset name: list of row dicts}
+        self.indexes = [DatasetIndex(name, rows) for name, rows in datasets.items() if rows]
+
+    @classmethod
+    def from_frames(cls, frames):
+        return cls({
+            name: frame.to_dict("records") for name, frame in frames.items() if frame is not None
+        })
+
+    # Function to get [(dataset name, [rows])] relevant to the question and the user's details
+    def retrieve(self, question, user_info=None, max_rows=DEFAULT_MAX_ROWS):
+        user_info = user_info or {}
+        question_words = _words(question)
+        scored = [(index.relevance(question_words), index) for index in self.indexes]
+        scored = [item for item in scored if item[0] > 0]
+        scored.sort(key=lambda item: item[0], reverse=True)
+
+        years = [int(year) for year in YEAR_PATTERN.findall(question)]
+        age = user_info.get("age_group")
+        age = int(age) if age and str(age).isdigit() else None
+        gender = user_info.get("gender")
+
+        results = []
+        for _score, index in scored[:MAX_DATASETS]:
+            row_ids = index.select(years, age, gender, max_rows)
+            if row_ids:
+                results.append((index.name, [index.rows[row_id] for row_id in row_ids]))
+        return results
+
+
+# Function to format retrieved rows as a delimited block for the prompt
+def format_reference_data(results):
+    if not results:
+        return ""
+    lines = ["<Reference Data>"]
+    for name, rows in results:
+        lines.append(f"[{name}]")
+        for row in rows:
+            lines.append(" | ".join(f"{column}: {value}" for column, value in row.items()
+                                    if column != "_id" and value is not None and value == value))
+    lines.append("</Reference Data>")
+    return "\n".join(lines)
@@ -0,0 +1,128 @@
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+# """
+# This file contains the sentiment and topic scoring for feedback messages.
+# It is a lexicon model evaluated with NumPy over whole batches: messages are
+# tokenised once, mapped to vocabulary ids, and scored with array operations
+# (no LLM call, CPU only), so thousands of messages score in milliseconds.
+# """
+
+TOKEN_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+POSITIVE_LABEL_THRESHOLD = 0.2
+NEGATIVE_LABEL_THRESHOLD = -0.2
+NEGATION_WINDOW = 2  # A negator flips the sentiment of the next two words
+
+NEGATORS = {"not", "no", "never", "nothing", "hardly", "cannot", "can't", "don't", "didn't",
+            "doesn't", "isn't", "wasn't", "won't", "couldn't", "wouldn't", "without"}
+
+SENTIMENT_WEIGHTS = {
+    # Positive
+    "good": 1.0, "great": 1.5, "excellent": 2.0, "helpful": 1.5, "useful": 1.2, "clear": 1.0,
+    "easy": 1.0, "fast": 1.0, "quick": 1.0, "thanks": 1.0, "thank": 1.0, "love": 1.8,
+    "amazing": 2.0, "friendly": 1.2, "accurate": 1.2, "informative": 1.3, "satisfied": 1.5,
+    "happy": 1.5, "pleased": 1.4, "appreciate": 1.3, "nice": 1.0, "smooth": 1.0, "best": 1.5,
+    "recommend": 1.2, "convenient": 1.2, "patient": 1.0, "efficient": 1.2, "well": 0.6,
+    # Negative
+    "bad": -1.2, "poor": -1.3, "terrible": -2.0, "awful": -2.0, "slow": -1.0, "wrong": -1.3,
+    "incorrect": -1.4, "confusing": -1.3, "confused": -1.0, "unhelpful": -1.5, "useless": -1.8,
+    "error": -1.0, "errors": -1.0, "fail": -1.2, "failed": -1.2, "broken": -1.5, "crash": -1.5,
+    "frustrating": -1.6, "frustrated": -1.5, "angry": -1.8, "disappointed": -1.6, "rude": -1.8,
+    "unclear": -1.2, "difficult": -1.0, "hard": -0.6, "annoying": -1.4, "worst": -2.0,
+    "waste": -1.5, "unhappy": -1.5, "dissatisfied": -1.6, "late": -0.8, "delay": -1.0,
+    "delayed": -1.0, "misleading": -1.6, "inaccurate": -1.5, "complicated": -1.0, "hate": -1.8,
+}
+
+TOPIC_KEYWORDS = {
+    "withdrawals": {"withdraw", "withdrawal", "withdrawals", "withdrawing", "lump", "cash"},
+    "payouts": {"payout", "payouts", "monthly", "rss", "life", "annuity", "scheme"},
+    "retirement sums": {"frs", "brs", "ers", "full", "basic", "enhanced", "sum", "sums", "topup", "top"},
+    "contributions": {"contribution", "contributions", "contribute", "employer", "salary", "rate", "rates"},
+    "healthcare": {"medisave", "medishield", "hospital", "medical", "health", "careshield"},
+    "housing": {"housing", "hdb", "flat", "property", "mortgage", "loan"},
+    "chatbot experience": {"chatbot", "bot", "app", "answer", "answers", "response", "responses",
+                           "website", "page", "slow", "loading", "bug", "error", "errors", "crash"},
+    "service": {"staff", "officer", "service", "appointment", "counter", "call", "hotline", "colleague"},
+}
+GENERAL_TOPIC = "general"
+
+# Vocabulary: every word the model knows gets an id; weights and topics are arrays over ids
+_VOCABULARY = {}
+for _word in list(SENTIMENT_WEIGHTS) + sorted(NEGATORS) + sorted(set().union(*TOPIC_KEYWORDS.values())):
+    _VOCABULARY.setdefault(_word, len(_VOCABULARY))
+_UNKNOWN = len(_VOCABULARY)
+
+_WEIGHTS = np.zeros(_UNKNOWN + 1)
+for _word, _weight in SENTIMENT_WEIGHTS.items():
+    _WEIGHTS[_VOCABULARY[_word]] = _weight
+
+_IS_NEGATOR = np.zeros(_UNKNOWN + 1, dtype=bool)
+_IS_NEGATOR[[_VOCABULARY[word] for word in NEGATORS]] = True
+
+TOPICS = list(TOPIC_KEYWORDS)
+_TOPIC_MATRIX = np.zeros((_UNKNOWN + 1, len(TOPICS)), dtype=np.float32)
+for _index, _topic in enumerate(TOPICS):
+    _TOPIC_MATRIX[[_VOCABULARY[word] for word in TOPIC_KEYWORDS[_topic]], _index] = 1.0
+
+
+@dataclass(frozen=True)
+class FeedbackScore:
+    sentiment: float  # -1 (very negative) to 1 (very positive)
+    label: str  # "positive", "neutral" or "negative"
+    topic: str
+
+
+def _encode(messages):
+    """Returns (token ids, message index of each token, token count per message)."""
+    ids, owners, counts = [], [], []
+    vocabulary_get = _VOCABULARY.get
+    for index, message in enumerate(messages):
+        tokens = TOKEN_PATTERN.findall((message or "").lower())
+        ids.extend(vocabulary_get(token, _UNKNOWN) for token in tokens)
+        owners.extend([index] * len(tokens))
+        counts.append(len(tokens))
+    return np.fromiter(ids, dtype=np.int64, count=len(ids)), np.asarray(owners, dtype=np.int64), np.asarray(counts)
+
+
+# Function to score a batch of messages: arrays of sentiment scores, labels and topics
+def score_arrays(messages):
+    n = len(messages)
+    if n == 0:
+        return np.zeros(0), np.array([], dtype=object), np.array([], dtype=object)
+    ids, owners, counts = _encode(messages)
+
+    # A token is negated if a negator from the same message precedes it within the window
+    negated = np.zeros(len(ids), dtype=bool)
+    is_negator = _IS_NEGATOR[ids]
+    for shift in range(1, NEGATION_WINDOW + 1):
+        if len(ids) > shift:
+            negated[shift:] |= is_negator[:-shift] & (owners[shift:] == owners[:-shift])
+    weights = np.where(negated, -_WEIGHTS[ids], _WEIGHTS[ids])
+
+    raw = np.bincount(owners, weights=weights, minlength=n)
+    sentiment = np.tanh(raw / np.sqrt(np.maximum(counts, 1) / 4 + 1))
+    labels = np.full(n, "neutral", dtype=object)
+    labels[sentiment >= POSITIVE_LABEL_THRESHOLD] = "positive"
+    labels[sentiment <= NEGATIVE_LABEL_THRESHOLD] = "negative"
+
+    token_topics = _TOPIC_MATRIX[ids]
+    topic_counts = np.column_stack([
+        np.bincount(owners, weights=token_topics[:, index], minlength=n) for index in range(len(TOPICS))
+    ])
+    best = topic_counts.argmax(axis=1)
+    topics = np.array(TOPICS + [GENERAL_TOPIC], dtype=object)[
+        np.where(topic_counts.max(axis=1) > 0, best, len(TOPICS))
+    ]
+    return sentiment, labels, topics
+
+
+# Function to score a batch of messages into FeedbackScore records
+def score_batch(messages):
+    sentiment, labels, topics = score_arrays(messages)
+    return [
+        FeedbackScore(round(float(score), 4), label, topic)
+        for score, label, topic in zip(sentiment, labels, topics)
+    ]
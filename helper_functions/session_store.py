@@ -0,0 +1,398 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+
+from helper_functions.context_manager import ConversationContext
+
+# """
+# This file contains the server-side store for each chat session's state:
+# the user's details, the displayed messages and the conversation context.
+# Messages are compact __slots__ records whose roles (and short texts, such
+# as repeated questions and form values) are interned, so identical strings
+# are shared across sessions. Each session keeps at most `max_messages` in
+# memory, idle sessions are evicted, and the number of sessions in memory is
+# capped. With a spill path, evicted sessions and older messages are written
+# to a local SQLite file and read back if the same session asks again (a
+# Streamlit session id lives as long as its browser connection, so nothing is
+# carried over to a new visit); without it, they are dropped. Spilled sessions
+# not asked for within `spill_ttl_seconds` are purged, so the file stays
+# bounded too. Memory per session is therefore bounded, and measured.
+# Idle sessions are looked for, written out and purged by a background thread, so
+# no request waits on the disk for another session. A session pinned by a
+# script run is never evicted while the run uses it.
+# """
+
+DEFAULT_IDLE_SECONDS = 30 * 60
+DEFAULT_MAX_MESSAGES = 200  # Per session, in memory
+DEFAULT_MAX_SESSIONS = 1000  # In memory; the least recently used are evicted first
+SWEEP_SECONDS = 60  # How often idle sessions are looked for
+DEFAULT_SPILL_TTL_SECONDS = 24 * 60 * 60  # Spilled sessions not asked for since are deleted
+INTERN_MAX_CHARS = 80  # Longer texts are rarely repeated word for word
+
+USER = sys.intern("user")
+ASSISTANT = sys.intern("assistant")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    user_info TEXT,
+    conversation BLOB,
+    message_count INTEGER NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen);
+"""
+
+
+def _intern(value):
+    if isinstance(value, str) and len(value) <= INTERN_MAX_CHARS:
+        return sys.intern(value)
+    return value
+
+
+class Message:
+    __slots__ = ("role", "content")
+
+    def __init__(self, role, content):
+        self.role = sys.intern(role)
+        self.content = _intern(content)
+
+
+class SessionState:
+    """One session's state. `spilled` messages (the oldest) are on disk, the rest in `messages`."""
+
+    __slots__ = ("session_id", "user_info", "conversation", "messages", "spilled", "last_seen", "pins")
+
+    def __init__(self, session_id, conversation, user_info=None, spilled=0):
+        self.session_id = session_id
+        self.conversation = conversation
+        self.user_info = user_info
+        self.messages = []
+        self.spilled = spilled
+        self.last_seen = time.monotonic()
+        self.pins = 0  # Script runs using this state; a pinned session is never evicted
+
+    @property
+    def message_count(self):
+        return self.spilled + len(self.messages)
+
+    def set_user_info(self, user_info):
+        self.user_info = {key: _intern(value) for key, value in user_info.items()}
+
+
+class MessageHistory:
+    """Read-only view of a session's messages: len() and slices, reading spilled messages from disk."""
+
+    __slots__ = ("store", "state")
+
+    def __init__(self, store, state):
+        self.store = store
+        self.state = state
+
+    def __len__(self):
+        return self.state.message_count
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("MessageHistory only supports slices")
+        start, stop, _step = index.indices(self.state.message_count)
+        return self.store._messages(self.state, start, stop)
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+# Function to turn a conversation into JSON-safe data (None stays None)
+def _dump_conversation(conversation):
+    return conversation.to_dict() if conversation is not None else None
+
+
+class SessionStore:
+    """Process-wide store of chat session state with idle eviction and an optional SQLite spill.
+
+    `_lock` guards the sessions; `_db_lock` guards the SQLite connection and is only ever taken
+    inside `_lock` or on its own, never the other way round.
+    """
+
+    def __init__(self, idle_seconds=DEFAULT_IDLE_SECONDS, max_messages=DEFAULT_MAX_MESSAGES,
+                 max_sessions=DEFAULT_MAX_SESSIONS, spill_path=None, conversation_factory=ConversationContext,
+                 sweep_seconds=SWEEP_SECONDS, spill_ttl_seconds=DEFAULT_SPILL_TTL_SECONDS):
+        self.idle_seconds = idle_seconds
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.conversation_factory = conversation_factory
+        self.sweep_seconds = sweep_seconds
+        self.spill_ttl_seconds = spill_ttl_seconds
+        self._sessions = OrderedDict()  # session id -> SessionState, least recently used first
+        self._evicting = {}  # session id -> SessionState evicted but not yet written to the spill file
+        self._lock = threading.RLock()
+        self._db_lock = threading.Lock()
+        self._sweep_lock = threading.Lock()  # One sweep at a time, so a session's writes never interleave
+        self._connection = None
+        if spill_path:
+            os.makedirs(os.path.dirname(spill_path) or ".", exist_ok=True)
+            self._connection = _connect(spill_path)
+            with self._connection:
+                self._connection.executescript(SCHEMA)
+                # Messages of sessions that were in memory when the last process stopped: nobody can ask for them
+                self._connection.execute(
+                    "DELETE FROM messages WHERE session_id NOT IN (SELECT session_id FROM sessions)"
+                )
+        self.stats = {"created": 0, "evicted": 0, "restored": 0, "spilled_messages": 0, "dropped_messages": 0,
+                      "purged": 0}
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        if sweep_seconds:
+            self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+            self._thread.start()
+
+    # Function to get a session's state (restored from the spill file, or new), marking it as active
+    def get(self, session_id):
+        with self._lock:
+            now = time.monotonic()
+            state = self._sessions.get(session_id)
+            if state is not None:
+                self._sessions.move_to_end(session_id)
+            else:
+                # A session being written out is taken back as it is
+                state = self._evicting.pop(session_id, None) or self._restore(session_id)
+                if state is None:
+                    state = SessionState(session_id, self.conversation_factory())
+                    self.stats["created"] += 1
+                self._sessions[session_id] = state
+                excess = len(self._sessions) - self.max_sessions
+                if excess > 0:
+                    oldest = islice((candidate for candidate in self._sessions.values()
+                                     if not candidate.pins and candidate is not state), excess)
+                    for candidate in list(oldest):
+                        self._detach(candidate)
+                    self._wake.set()  # The sweeper writes them out, off the request path
+            state.last_seen = now
+            return state
+
+    # Context manager: the session's state, pinned in memory for as long as the block runs
+    @contextmanager
+    def pinned(self, session_id):
+        with self._lock:
+            state = self.get(session_id)
+            state.pins += 1
+        try:
+            yield state
+        finally:
+            with self._lock:
+                state.pins -= 1
+                state.last_seen = time.monotonic()
+
+    def history(self, state):
+        return MessageHistory(self, state)
+
+    def add_message(self, state, role, content):
+        with self._lock:
+            state.messages.append(Message(role, content))
+            state.last_seen = time.monotonic()
+            overflow = len(state.messages) - self.max_messages
+            if overflow > 0:
+                oldest = state.messages[:overflow]
+                del state.messages[:overflow]
+                if self._connection is not None:
+                    with self._db_lock:
+                        self._write_messages(state.session_id, state.spilled, oldest)
+                    state.spilled += overflow
+                    self.stats["spilled_messages"] += overflow
+                else:
+                    self.stats["dropped_messages"] += overflow
+
+    # Function to forget a session entirely (e.g. the "Return" button on the Feedback page)
+    def reset(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._evicting.pop(session_id, None)
+            if self._connection is not None:
+                with self._db_lock, self._connection:
+                    self._connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                    self._connection.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+    # Background thread: sweep (and purge) every sweep_seconds, or at once when get() has evicted sessions to write out
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.sweep_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.sweep()
+
+    # Function to evict the sessions idle for longer than idle_seconds and write them out; returns how many
+    def sweep(self, now=None):
+        with self._sweep_lock:
+            with self._lock:
+                now = time.monotonic() if now is None else now
+                idle = [state for state in self._sessions.values()
+                        if not state.pins and now - state.last_seen > self.idle_seconds]
+                for state in idle:
+                    self._detach(state)
+                evicting = list(self._evicting.values())
+            # The writes happen outside the store's lock: requests for other sessions go on meanwhile
+            for state in evicting:
+                self._spill(state)
+            self.purge()
+            return len(idle)
+
+    # Function to delete the spilled sessions not asked for in spill_ttl_seconds; returns how many
+    def purge(self, now=None):
+        now = time.time() if now is None else now  # Wall clock, as stored in last_seen
+        with self._db_lock:
+            if self._connection is None:
+                return 0
+            cutoff = (now - self.spill_ttl_seconds,)
+            with self._connection:
+                self._connection.execute(
+                    "DELETE FROM messages WHERE session_id IN (SELECT session_id FROM sessions WHERE last_seen < ?)",
+                    cutoff,
+                )
+                purged = self._connection.execute("DELETE FROM sessions WHERE last_seen < ?", cutoff).rowcount
+        self.stats["purged"] += purged
+        return purged
+
+    def _detach(self, state):
+        del self._sessions[state.session_id]
+        self.stats["evicted"] += 1
+        if self._connection is not None:
+            self._evicting[state.session_id] = state
+
+    def _spill(self, state):
+        with self._db_lock:
+            if self._connection is None:
+                return
+            self._write_messages(state.session_id, state.spilled, state.messages)
+            with self._connection:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, user_info, conversation, message_count, last_seen) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (state.session_id, json.dumps(state.user_info), json.dumps(_dump_conversation(state.conversation)),
+                     state.message_count, time.time()),
+                )
+        with self._lock:
+            if self._evicting.get(state.session_id) is state:
+                del self._evicting[state.session_id]
+                self.stats["spilled_messages"] += len(state.messages)
+            elif self._sessions.get(state.session_id) is state and self._connection is not None:
+                # Taken back while it was being written: it lives in memory, not in the spill file
+                with self._db_lock, self._connection:
+                    self._connection.execute("DELETE FROM sessions WHERE session_id = ?", (state.session_id,))
+
+    def _write_messages(self, session_id, first_seq, messages):
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                [(session_id, first_seq + offset, message.role, message.content)
+                 for offset, message in enumerate(messages)],
+            )
+
+    def _restore(self, session_id):
+        if self._connection is None:
+            return None
+        with self._db_lock:
+            row = self._connection.execute(
+                "SELECT user_info, conversation, message_count FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            with self._connection:
+                self._connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        # The messages stay on disk and are read back only when they are displayed
+        state = SessionState(session_id, self._load_conversation(row[1]), spilled=row[2])
+        if row[0] is not None:
+            state.set_user_info(json.loads(row[0]))
+        self.stats["restored"] += 1
+        return state
+
+    def _load_conversation(self, data):
+        try:
+            data = json.loads(data) if data is not None else None
+        except ValueError:
+            data = None  # Written by an older version; the displayed messages are still restored
+        if data is None:
+            return self.conversation_factory()
+        return ConversationContext.from_dict(data)
+
+    def _messages(self, state, start, stop):
+        with self._lock:
+            messages = []
+            if start < state.spilled and self._connection is not None:
+                with self._db_lock:
+                    rows = self._connection.execute(
+                        "SELECT role, content FROM messages WHERE session_id = ? AND seq >= ? AND seq < ? "
+                        "ORDER BY seq",
+                        (state.session_id, start, min(stop, state.spilled)),
+                    ).fetchall()
+                messages.extend(Message(role, content) for role, content in rows)
+            memory_start = max(start - state.spilled, 0)
+            memory_stop = max(stop - state.spilled, 0)
+            messages.extend(state.messages[memory_start:memory_stop])
+            return messages
+
+    # Approximate bytes held for a session: its records, containers and texts (interned texts are shared)
+    @staticmethod
+    def state_bytes(state):
+        size = sys.getsizeof(state) + sys.getsizeof(state.messages)
+        for message in state.messages:
+            size += sys.getsizeof(message)
+            if len(message.content) > INTERN_MAX_CHARS:
+                size += sys.getsizeof(message.content)
+        if state.user_info:
+            size += sys.getsizeof(state.user_info)
+        conversation = state.conversation
+        for turn in getattr(conversation, "turns", ()):
+            size += sys.getsizeof(turn)
+        for line in getattr(conversation, "summary_lines", ()):
+            size += sys.getsizeof(line)
+        return size
+
+    def summary(self):
+        with self._lock:
+            states = list(self._sessions.values())
+            sizes = [self.state_bytes(state) for state in states]
+            spilled_sessions = None
+            if self._connection is not None:
+                with self._db_lock:
+                    spilled_sessions = self._connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            return dict(
+                self.stats,
+                sessions=len(states),
+                messages=sum(len(state.messages) for state in states),
+                bytes=sum(sizes),
+                max_session_bytes=max(sizes, default=0),
+                spilled_sessions=spilled_sessions,
+            )
+
+    # Stop the sweeper, write out the sessions already evicted and close the spill file
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        with self._sweep_lock:
+            for state in list(self._evicting.values()):
+                self._spill(state)
+        with self._lock, self._db_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,203 @@
+import threading
+
+from helper_functions.text import normalize_text
+from helper_functions.telemetry import telemetry
+
+# """
+# This file contains the single-flight layer: concurrent identical requests
+# (same normalised prompt, or same URL) share one in-flight upstream call.
+# The first caller (the leader) makes the call; callers that arrive while it
+# is running wait for its result, or its error, instead of making their own.
+# Streams are shared too: followers replay the chunks received so far and
+# then read new ones as they arrive. Nothing is kept once the call ends, so
+# this never serves stale answers (that is the response cache's job).
+# Only the outcome of the call itself is shared: if the leader is stopped
+# (e.g. a Streamlit rerun) or fails for a reason of its own (e.g. its
+# session's quota), a follower takes over the call instead.
+# """
+
+
+# Function to key a chat completion on its model and normalised messages
+def request_key(model, messages):
+    return model, tuple((message["role"], normalize_text(message["content"])) for message in messages)
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "abandoned", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False  # The leader gave up without an outcome to share; a follower takes over
+        self.followers = 0
+
+
+class _StreamFlight:
+    __slots__ = ("condition", "chunks", "finished", "error", "abandoned", "followers")
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.chunks = []
+        self.finished = False
+        self.error = None
+        self.abandoned = False
+        self.followers = 0
+
+    def add(self, chunk):
+        with self.condition:
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one upstream call.
+
+    `private_error(error)` tells errors that belong to the leader alone (and are never passed on).
+    """
+
+    def __init__(self, name, private_error=None):
+        self.name = name
+        self.private_error = private_error or (lambda error: False)
+        self._lock = threading.Lock()
+        self._flights = {}  # key -> _Flight or _StreamFlight in progress
+        self.stats = {"calls": 0, "shared": 0, "taken_over": 0}
+
+    def _join(self, key, factory, retry=False):
+        with self._lock:
+            if retry:
+                self.stats["taken_over"] += 1
+            else:
+                self.stats["calls"] += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                self.stats["shared"] += 1
+                leader = False
+            else:
+                flight = self._flights[key] = factory()
+                leader = True
+        telemetry.increment("single_flight", path=self.name, role="leader" if leader else "follower")
+        return flight, leader
+
+    # Function to run func() once for all concurrent callers with the same key; each gets its result (or error)
+    def do(self, key, func):
+        retry = False
+        while True:
+            flight, leader = self._join(key, _Flight, retry)
+            if not leader:
+                flight.done.wait()
+                if flight.abandoned:
+                    retry = True  # Make the call (or follow whoever made it first)
+                    continue
+                if flight.error is not None:
+                    raise flight.error
+                return flight.result
+            try:
+                flight.result = func()
+                return flight.result
+            except Exception as e:
+                if self.private_error(e):
+                    flight.abandoned = True
+                else:
+                    flight.error = e
+                raise
+            except BaseException:
+                # Stopping or rerunning the leader's script is no outcome for anyone else
+                flight.abandoned = True
+                raise
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+
+    # Generator: iterate make_stream() once for all concurrent callers with the same key.
+    # A caller joins when it starts reading, so a stream that is never read never holds up anyone.
+    def stream(self, key, make_stream):
+        retry = False
+        while True:
+            flight, leader = self._join(key, _StreamFlight, retry)
+            if leader:
+                yield from self._lead(key, flight, make_stream)
+                return
+            # A follower that has read nothing yet takes over from a leader that gave up
+            retry = yield from self._follow(flight)
+            if not retry:
+                return
+
+    def _lead(self, key, flight, make_stream):
+        upstream = None
+        handed_off = False
+        try:
+            upstream = make_stream()
+            for chunk in upstream:
+                flight.add(chunk)
+                yield chunk
+        except GeneratorExit:
+            # The leader stopped reading (e.g. a Streamlit rerun): finish the stream for its followers
+            with self._lock:
+                handed_off = upstream is not None and flight.followers > 0
+                if not handed_off:
+                    del self._flights[key]  # Nobody else is waiting; later callers start afresh
+            if handed_off:
+                threading.Thread(target=self._drain, args=(key, flight, upstream),
+                                 name=f"{self.name}-single-flight", daemon=True).start()
+            raise
+        except Exception as e:
+            if self.private_error(e) and not flight.chunks:
+                flight.abandoned = True
+            else:
+                flight.error = e
+            raise
+        except BaseException:
+            flight.abandoned = True
+            raise
+        finally:
+            if not handed_off:
+                if upstream is not None:
+                    upstream.close()
+                self._finish(key, flight)
+
+    def _drain(self, key, flight, upstream):
+        try:
+            for chunk in upstream:
+                flight.add(chunk)
+        except Exception as e:
+            flight.error = e
+        finally:
+            upstream.close()
+            self._finish(key, flight)
+
+    def _finish(self, key, flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        with flight.condition:
+            flight.finished = True
+            flight.condition.notify_all()
+
+    # Generator: yields the shared chunks; returns True if the leader gave up before sending any
+    @staticmethod
+    def _follow(flight):
+        index = 0
+        while True:
+            with flight.condition:
+                while index >= len(flight.chunks) and not flight.finished:
+                    flight.condition.wait()
+                chunks = flight.chunks[index:]
+                finished = flight.finished
+            for chunk in chunks:
+                yield chunk
+            index += len(chunks)
+            if finished and index >= len(flight.chunks):
+                if flight.abandoned:
+                    if not index:
+                        return True
+                    raise RuntimeError("The shared answer was interrupted. Please ask again.")
+                if flight.error is not None:
+                    raise flight.error
+                return False
+
+    def summary(self):
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._flights))
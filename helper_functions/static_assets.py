@@ -0,0 +1,96 @@
+import io
+import os
+
+# """
+# This file contains the static asset pipeline for the app's images.
+# The Methodology diagrams are downloaded once at build time, resized to the
+# width they are displayed at and compressed into the images folder, so the
+# page serves them locally instead of loading them from a third-party host.
+# A diagram that has not been built is shown as a placeholder; the page never
+# loads anything from elsewhere. The static pages' text is merged into as few
+# elements as possible once per process (see get_static_page in resources).
+#
+# Build (or rebuild) the assets from the repository root with:
+#     python -m helper_functions.static_assets
+# """
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images")
+DISPLAY_WIDTH = 704  # Width of Streamlit's main column in the default centered layout
+JPEG_QUALITY = 82
+
+# Local file name -> original (remote) image
+SOURCE_IMAGES = {
+    "use_case_1.jpg": "https://i.postimg.cc/K8mpSLfp/use-case-1.jpg",
+    "use_case_2.jpg": "https://i.postimg.cc/q7RmgT98/use-case-2.jpg",
+    "use_case_3.jpg": "https://i.postimg.cc/SxVTystS/use-case-3.jpg",
+}
+
+
+# Function to merge a static page's blocks: titles, subheaders and markdown in a row become one markdown block
+def merge_blocks(blocks):
+    """`blocks` are ("title" | "subheader" | "markdown", text) or ("image", name, caption)."""
+    merged, texts = [], []
+    prefixes = {"title": "# ", "subheader": "### ", "markdown": ""}
+    for block in blocks:
+        if block[0] in prefixes:
+            texts.append(prefixes[block[0]] + block[1])
+            continue
+        if texts:
+            merged.append(("markdown", "\n\n".join(texts)))
+            texts = []
+        merged.append(block)
+    if texts:
+        merged.append(("markdown", "\n\n".join(texts)))
+    return tuple(merged)
+
+
+# Function to get the local path of a bundled image
+def image_path(name):
+    return os.path.join(IMAGES_DIR, name)
+
+
+# Function to read a bundled image, or None if the assets have not been built
+def read_image(name):
+    try:
+        with open(image_path(name), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+# Function to resize image bytes to the display width and re-encode them as a progressive JPEG
+def optimize_image(data, width=DISPLAY_WIDTH, quality=JPEG_QUALITY):
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGB")
+        if image.width > width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+# Function to download, optimize and write every source image into the images folder
+def build_assets(force=False):
+    import requests
+
+    os.makedirs(IMAGES_DIR, exist_ok=True)
+    for name, url in SOURCE_IMAGES.items():
+        path = image_path(name)
+        if os.path.exists(path) and not force:
+            print(f"{name}: up to date")
+            continue
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        data = optimize_image(response.content)
+        with open(path, "wb") as f:
+            f.write(data)
+        print(f"{name}: {len(response.content):,} -> {len(data):,} bytes")
+
+
+if __name__ == "__main__":
+    import sys
+
+    build_assets(force="--force" in sys.argv)
@@ -0,0 +1,260 @@
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# """
+# This file contains the app's tracing and metrics. Stages of a chat turn are
+# timed as spans (nested spans share the turn's trace id), and counters track
+# tokens, bytes and cache hits. Metrics are kept in memory for the admin panel
+# (p50/p95/p99), can be scraped as Prometheus text, and spans can be written
+# to a rotating JSONL file by a background thread. When telemetry is disabled,
+# span() returns a shared no-op context and the counters return at once.
+# """
+
+METRIC_PREFIX = "chatbot"
+SAMPLES_PER_SPAN = 2048  # Recent durations kept per span name for the percentiles
+JSONL_MAX_BYTES = 5 * 1024 * 1024
+JSONL_BACKUP_COUNT = 3
+QUANTILES = (0.5, 0.95, 0.99)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("telemetry", "name", "attributes", "trace_id", "parent", "start", "started_at", "_token")
+
+    def __init__(self, telemetry, name, attributes):
+        self.telemetry = telemetry
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.parent = parent.name if parent else None
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self._token = _current_span.set(self)
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        duration = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.telemetry._finish(self, duration)
+        return False
+
+    # Add attributes once they are known (e.g. the number of tokens)
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+class Telemetry:
+    """In-process spans and counters, with optional JSONL and Prometheus export."""
+
+    def __init__(self, enabled=True, jsonl_path=None, max_bytes=JSONL_MAX_BYTES, backup_count=JSONL_BACKUP_COUNT,
+                 samples_per_span=SAMPLES_PER_SPAN):
+        self.enabled = enabled
+        self.samples_per_span = samples_per_span
+        self._lock = threading.Lock()
+        self._durations = {}  # span name -> deque of recent durations
+        self._totals = {}  # span name -> [count, sum of durations, errors]
+        self._counters = {}  # (name, sorted label items) -> value
+        self._listener = None
+        self._logger = None
+        self._server = None
+        if jsonl_path:
+            self._start_jsonl(jsonl_path, max_bytes, backup_count)
+
+    def _start_jsonl(self, path, max_bytes, backup_count):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                       encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        # Spans are queued and written by the listener thread, never on the request path
+        records = queue.SimpleQueue()
+        self._listener = logging.handlers.QueueListener(records, handler)
+        self._listener.start()
+        self._logger = logging.getLogger(f"{__name__}.{id(self)}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(logging.handlers.QueueHandler(records))
+
+    # Function to time a block: `with telemetry.span("chat.llm", model=...) as span:`
+    def span(self, name, **attributes):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, attributes)
+
+    # Record a duration timed elsewhere (e.g. by the LLM client) as a span
+    def observe(self, name, seconds, **attributes):
+        if not self.enabled:
+            return
+        self._record_duration(name, seconds, "error" in attributes)
+        if self._logger is not None:
+            self._write({"span": name, "ts": time.time() - seconds, "ms": round(seconds * 1000, 3), **attributes})
+
+    def increment(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def _record_duration(self, name, seconds, failed):
+        with self._lock:
+            samples = self._durations.get(name)
+            if samples is None:
+                samples = self._durations[name] = deque(maxlen=self.samples_per_span)
+                self._totals[name] = [0, 0.0, 0]
+            samples.append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += failed
+
+    def _finish(self, span, duration):
+        self._record_duration(span.name, duration, "error" in span.attributes)
+        if self._logger is not None:
+            self._write({"span": span.name, "trace": span.trace_id, "parent": span.parent,
+                         "ts": span.started_at, "ms": round(duration * 1000, 3), **span.attributes})
+
+    def _write(self, record):
+        self._logger.info(json.dumps(record, default=str))
+
+    # Function to get per-span count, errors, mean and p50/p95/p99 (seconds), slowest p95 first
+    def span_summary(self):
+        with self._lock:
+            snapshot = {name: (sorted(samples), list(self._totals[name])) for name, samples in self._durations.items()}
+        rows = []
+        for name, (samples, (count, total, errors)) in snapshot.items():
+            rows.append({
+                "span": name, "count": count, "errors": errors, "mean": total / count if count else None,
+                **{f"p{round(q * 100)}": percentile(samples, q) for q in QUANTILES},
+            })
+        rows.sort(key=lambda row: row["p95"] or 0, reverse=True)
+        return rows
+
+    def counters(self):
+        with self._lock:
+            return [{"counter": name, "labels": ", ".join(f"{label}={value}" for label, value in labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())]
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._totals.clear()
+            self._counters.clear()
+
+    # Function to render every metric in the Prometheus text exposition format
+    def prometheus_text(self):
+        def metric_name(name):
+            return f"{METRIC_PREFIX}_" + "".join(c if c.isalnum() else "_" for c in name)
+
+        def label_text(labels):
+            if not labels:
+                return ""
+            escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _key, value in labels)
+            return "{" + ",".join(f'{key}="{value}"' for (key, _value), value in zip(labels, escaped)) + "}"
+
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            spans = {name: (sorted(samples), list(self._totals[name])) for name, samples in self._durations.items()}
+        typed = set()
+        for (name, labels), value in counters:
+            metric = metric_name(name) + "_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{label_text(labels)} {value}")
+        if spans:
+            metric = f"{METRIC_PREFIX}_span_duration_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for name, (samples, (count, total, _errors)) in sorted(spans.items()):
+                for q in QUANTILES:
+                    lines.append(f'{metric}{{span="{name}",quantile="{q}"}} {percentile(samples, q):.6f}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {total:.6f}')
+                lines.append(f'{metric}_count{{span="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    # Serve prometheus_text() at http://host:port/metrics from a background thread
+    def start_http_exporter(self, port, host="127.0.0.1"):
+        if self._server is not None:
+            return self._server.server_address[1]
+        telemetry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-exporter", daemon=True).start()
+        return self._server.server_address[1]
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._listener is not None:
+            self._listener.stop()  # Writes out the queued spans first
+            self._listener = None
+            self._logger = None
+
+
+# The process-wide instance that the helpers record into (disabled until resources.get_telemetry() configures it)
+telemetry = Telemetry(enabled=False)
+
+
+def configure(enabled=True, jsonl_path=None, metrics_port=None):
+    telemetry.close()
+    telemetry.enabled = enabled
+    if enabled and jsonl_path:
+        telemetry._start_jsonl(jsonl_path, JSONL_MAX_BYTES, JSONL_BACKUP_COUNT)
+    if enabled and metrics_port:
+        telemetry.start_http_exporter(metrics_port)
+    return telemetry
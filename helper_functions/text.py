@@ -0,0 +1,14 @@
+import re
+
+# """
+# This file contains the text helpers shared by the caches. It only uses the
+# standard library, so the layers that key on text (the single-flight layer
+# in front of the data.gov.sg fetches, for one) do not pull in the intent
+# router or numpy.
+# """
+
+
+# Function to normalise text so trivial differences (case, spacing, end punctuation) still match
+def normalize_text(text):
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.strip(" ?!.")
@@ -4,31 +4,60 @@ import hmac
 
 # """  
 # This file contains the common components used in the Streamlit App.  
-# This includes the sidebar, the title, the footer, and the password check.  
+# This includes the sidebar, the title, the footer, the password check and  
+# the rendering of the static pages.  
 # """  
 
-def check_password():  
-    """Returns `True` if the user had the correct password."""  
+def check_password(secret_name="password", label="Password"):  
+    """Returns `True` if the user had the correct password (the secret `secret_name`, e.g. "admin_password")."""  
+    correct_key = f"{secret_name}_correct"
+
     def password_entered():  
         """Checks whether a password entered by the user is correct."""  
-        if hmac.compare_digest(st.session_state["password"], st.secrets["password"]):  
-            st.session_state["password_correct"] = True  
-            del st.session_state["password"]  # Don't store the password.  
+        if hmac.compare_digest(st.session_state[secret_name], st.secrets[secret_name]):  
+            st.session_state[correct_key] = True  
+            del st.session_state[secret_name]  # Don't store the password.  
         else:  
-            st.session_state["password_correct"] = False  
+            st.session_state[correct_key] = False  
     
     # Return True if the passward is validated.  
-    if st.session_state.get("password_correct", False):  
+    if st.session_state.get(correct_key, False):  
         return True  
+
+    # Without the secret, nobody can get in
+    if not st.secrets.get(secret_name):
+        st.error(f"😕 This page is disabled ({secret_name} is not set in the app secrets)")
+        return False
     
     # Show input for password.  
     st.text_input(  
-        "Password", type="password", on_change=password_entered, key="password"  
+        label, type="password", on_change=password_entered, key=secret_name  
     )  
-    if "password_correct" in st.session_state:  
+    if correct_key in st.session_state:  
         st.error("😕 Password incorrect")  
     return False
 
 
+# Function to get the id of the current browser session (None outside a Streamlit script run)
+def current_session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
 
+# Function to render a static page's merged blocks (see get_static_page); a missing diagram shows a placeholder
+def render_static_page(blocks):
+    from helper_functions.resources import get_static_image
 
+    for block in blocks:
+        if block[0] == "markdown":
+            st.markdown(block[1])
+            continue
+        _kind, name, caption = block
+        image = get_static_image(name)
+        if image is None:
+            st.warning(f"{caption}: this diagram has not been built. "
+                       "Run `python -m helper_functions.static_assets` and commit the images folder.")
+        else:
+            st.image(image, caption=caption, use_column_width=True)